@@ -0,0 +1,61 @@
+"""Benchmark of the chain product for many layers.
+
+Compares the sequential fold with the tree reduction of chain_product on precomputed transfer matrices, and the
+layer-by-layer evaluation with absorptioncoeff.solve, which evaluates the layers batched for few frequencies, for a
+graded porous panel discretized into thin sublayers.
+
+    python dev/bench_chain.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import absorptioncoeff, models  # noqa: E402
+
+LAYER_COUNTS = [4, 16, 64, 256, 1024]
+FREQUENCY_COUNTS = [100, 250, 500, 2000, 20000]
+AIR = (1.204, 343.2, 1.81e-5, 101325, 0)
+REPEATS = 3
+
+
+def best_time(function):
+    """Best time of REPEATS calls in seconds."""
+    times = []
+    for _ in range(REPEATS):
+        t = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def graded_panel(n_layers, thickness=100, sigma_front=5000, sigma_back=40000):
+    """Porous panel whose flow resistivity increases from the front to the back, in n_layers sublayers."""
+    return [['Porous', thickness / n_layers, sigma, 0.98, 1.01] for sigma in np.geomspace(sigma_front, sigma_back,
+                                                                                          n_layers)]
+
+
+def sequential_solve(materials, f):
+    """Layer-by-layer evaluation with the sequential fold."""
+    T = (models.transfer_matrix(material, f, *AIR[:4], AIR[4]) for material in materials)
+    return absorptioncoeff.AbsorptionCoeff(T, AIR[0] * AIR[1], AIR[4], chain_method='sequential').abs_coeff()
+
+
+if __name__ == '__main__':
+    print(f"{'layers':>6} {'freqs':>6} {'fold':>9} {'tree':>9} {'solve seq':>10} {'solve':>14}  max dev")
+    for n_frequencies in FREQUENCY_COUNTS:
+        f = np.linspace(20, 10000, n_frequencies)
+        for n_layers in LAYER_COUNTS:
+            materials = graded_panel(n_layers)
+            T = np.stack([models.transfer_matrix(material, f, *AIR) for material in materials])
+            fold = best_time(lambda: absorptioncoeff.chain_product(T, 'sequential'))
+            tree = best_time(lambda: absorptioncoeff.chain_product(T, 'tree'))
+            seq = best_time(lambda: sequential_solve(materials, f))
+            batched = best_time(lambda: absorptioncoeff.solve(materials, f, *AIR, backend='numpy'))
+            deviation = np.abs(sequential_solve(materials, f) - absorptioncoeff.solve(materials, f, *AIR,
+                                                                                    backend='numpy')).max()
+            print(f"{n_layers:>6} {n_frequencies:>6} {fold * 1000:7.2f}ms {tree * 1000:7.2f}ms {seq * 1000:8.2f}ms "
+                  f"{batched * 1000:12.2f}ms  {deviation:.1e}")
@@ -0,0 +1,43 @@
+"""Import-time benchmark of the numerical core.
+
+Runs each import in a fresh interpreter, reports the time and fails if one of the heavy optional packages is pulled in.
+
+    python dev/bench_import.py
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CORE_MODULES = ['src.models', 'src.absorptioncoeff', 'src.air', 'src.bands', 'src.pipeline', 'src.kernels',
+                'src.parallel', 'src.profiling']
+HEAVY_MODULES = ['scipy', 'numba', 'pandas', 'plotly', 'pendulum', 'streamlit']
+REPEATS = 5
+
+CHECK = """
+import sys, time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+print(','.join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def measure(module):
+    """Imports a module in a fresh interpreter and returns the best time and the heavy modules it loaded."""
+    times, loaded = [], ''
+    for _ in range(REPEATS):
+        out = subprocess.run([sys.executable, '-c', CHECK.format(module=module, heavy=HEAVY_MODULES)], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.splitlines()
+        times.append(float(out[0]))
+        loaded = out[1] if len(out) > 1 else ''
+    return min(times), loaded
+
+
+if __name__ == '__main__':
+    failed = False
+    for module in CORE_MODULES + ['src.utils']:
+        seconds, loaded = measure(module)
+        print(f"{module:<22} {seconds * 1000:8.1f} ms  {('loads ' + loaded) if loaded else ''}")
+        failed |= bool(loaded)
+    sys.exit(1 if failed else 0)
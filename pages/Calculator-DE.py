@@ -1,8 +1,10 @@
+import json
+
 import streamlit as st
 import numpy as np
 import pandas as pd
 
-from src import utils, models, absorptioncoeff
+from src import utils, models, absorptioncoeff, air, bands, cache, compare, library, measurements, profiling, ratings
 
 st.set_page_config(
     page_title="Absorptionsgrad Rechner DE",
@@ -11,6 +13,45 @@ st.set_page_config(
 # --- Initialising SessionState ---
 if "load_state" not in st.session_state:
     st.session_state.load_state = False
+if "comparison" not in st.session_state:
+    st.session_state.comparison = []
+
+catalogue = library.default_library()
+# both pages run as __main__ and share the cached functions, so the language is part of every view
+LANGUAGE = 'DE'
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_figure(result_key, view, _build):
+    """Builds a figure once per result and view, reruns for other widgets reuse it."""
+    return _build()
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_table(result_key, view, _build):
+    """Builds a dataframe once per result and view."""
+    return _build()
+
+
+@st.cache_data(show_spinner=False)
+def read_measurement(data):
+    return measurements.read_measurement(data)
+
+
+def overlay_measurement(fig, bars=False):
+    """Adds the uploaded measurement to a newly built figure."""
+    if measurement is None:
+        return fig
+    if bars:
+        return utils.add_measurement(fig, np.arange(len(measurement['center_freqs'])), measurement['band_measured'],
+                                     'Messung', 'Modell', bars=True)
+    return utils.add_measurement(fig, f_measured, alpha_measured, 'Messung', 'Modell')
+
+
+@st.cache_data(show_spinner=False)
+def compare_stacks(stacks, f, air_density, air_speed, viscosity, air_pressure, theta):
+    return compare.compare_stacks(stacks, f, air_density, air_speed, viscosity, air_pressure, theta)
+
 
 # Set the title and logo of the app
 col1, col2 = st.columns(2)
@@ -53,6 +94,12 @@ with st.expander('Werte ein/ausblenden...'):
     for i, column in enumerate(columns):
         column.markdown(f"##### Material # {i + 1}")
         key = f"Material {i + 1}"
+        catalogue_name = column.selectbox(f"Katalogmaterial", options=['Eigene Eingabe'] + catalogue.names(),
+                                          key=f"value0_{i}")
+        if catalogue_name != 'Eigene Eingabe':
+            material_dict[key] = catalogue.layer(catalogue_name)
+            column.caption(', '.join(str(value) for value in material_dict[key]))
+            continue
         value1 = column.selectbox(f"Modell", options=['Bitte wählen Sie', 'Poröser', 'Lochplatte', 'Platte', 'Luft'],
                                   key=f"value1_{i}")
         value2 = column.number_input(f"Dicke [mm]", key=f"value2_{i}", format='%0f')
@@ -61,7 +108,8 @@ with st.expander('Werte ein/ausblenden...'):
             value3 = column.number_input(f"Strömungswiderstand [Ns/m^4]", key=f"value3_{i}", format='%e')
             value4 = column.number_input(f"Porosität", key=f"value4_{i}", format='%0f', value=0.98)
             value5 = column.number_input(f"Tortuosität", key=f"value5_{i}", format='%0f', value=1.4)
-            material_dict[key] = [value1, value2, value3, value4, value5]
+            value12 = column.selectbox(f"Porenmodell", options=list(models.POROUS_MODELS), key=f"value12_{i}")
+            material_dict[key] = [value1, value2, value3, value4, value5, value12]
         if value1 == 'Lochplatte':
             value6 = column.number_input(f"Lochdurchmesser [mm]", key=f"value6_{i}", format='%0f')
             value7 = column.number_input(f"Lochabstand [mm]", key=f"value7_{i}", format='%0f')
@@ -86,43 +134,20 @@ st.markdown('----')
 
 ################## Variable definition ##################
 theta = theta * np.pi / 180
-air_density = air_pressure / (287.058 * (air_temp + 273.15))
-air_speed = 331.3 * np.sqrt(1 + (air_temp / 273.15))
-viscosity = (1.458 * 10 ** (-6) * (air_temp + 273.15) ** (3 / 2)) / (air_temp + 273.15 + 110.4)
+air_density, air_speed, viscosity = air.air_properties(air_temp, air_pressure)
 Z0 = air_speed * air_density
+model_names = {'Poröser': 'Porous', 'Lochplatte': 'Microperforated Plate', 'Platte': 'Plate', 'Luft': 'Air'}
+materials = []
 alphas = np.array([])
 
 ################## Computation ##################
+# opt-in profile of the calculation and the plots, see profiling.is_enabled
+profiler = profiling.Profile('calculator').start()
 try:
-    for f in f_range_full:
-        kx = 2 * np.pi * f / air_speed * np.sin(theta)
-        T = []
-
-        for l in range(num_materials):
-            key = str("Material " + str(l + 1))
-            L1 = material_dict[key][1] / 1000
-
-            if material_dict[key][0] == 'Poröser':
-                sigma = material_dict[key][2]
-                phi = material_dict[key][3]
-                alpha_inf = material_dict[key][4]
-                T.append(models.Porous_Absorber_JAC(f, air_density, air_speed, L1, viscosity, sigma, air_pressure, phi,
-                                                    alpha_inf, kx).get_T())
-            if material_dict[key][0] == 'Lochplatte':
-                d_hole = material_dict[key][2]
-                a = material_dict[key][3]
-                T.append(models.PerforatedPlate_Absorber(f, air_density, air_speed, L1, viscosity, d_hole, a).get_T())
-            if material_dict[key][0] == 'Platte':
-                density = material_dict[key][2]
-                E = material_dict[key][3]
-                nu = material_dict[key][4]
-                eta = material_dict[key][5]
-                T.append(
-                    models.Plate_Absorber(f, air_density, air_speed, L1, viscosity, theta, density, E, nu, eta).get_T())
-            if material_dict[key][0] == 'Luft':
-                T.append(models.Air_Absorber(f, air_density, air_speed, L1, viscosity, kx).get_T())
-
-        alphas = np.append(alphas, absorptioncoeff.AbsorptionCoeff(T, Z0, theta).abs_coeff())
+    materials = [[model_names.get(material[0], material[0])] + material[1:]
+                 for material in (material_dict[f"Material {l + 1}"] for l in range(num_materials))]
+    alphas = cache.cached_solve(materials, f_range_full, air_density, air_speed, viscosity, air_pressure, theta,
+                                solver=catalogue.solve)
 except:
     pass
 
@@ -130,19 +155,44 @@ except:
 # Plotting
 try:
     st.header('Plot :bar_chart:')
+    result_key = absorptioncoeff.stack_hash(materials, f_range_full, air_density, air_speed, viscosity, air_pressure,
+                                            theta)
+    measured_file = st.file_uploader('Gemessener Absorptionsgrad (CSV mit Frequenz und Alpha)', type=['csv', 'txt'])
+    measurement, measured_key = None, None
+    if measured_file is not None:
+        try:
+            f_measured, alpha_measured = read_measurement(measured_file.getvalue())
+            # the model is evaluated at the measured frequencies only
+            measurement = measurements.compare_measurement(
+                materials, f_measured, alpha_measured, air_density, air_speed, viscosity, air_pressure, theta,
+                plot_type='oct' if plot_type == 'Oktavbänder' else 'third',
+                solver=lambda *args: cache.cached_solve(*args, solver=catalogue.solve))
+            measured_key = measured_file.file_id
+        except ValueError as e:
+            st.error(str(e))
     if plot_type == 'Graph':
-        fig1 = utils.plotly_go_line(x=f_range,
-                                    y=alphas[f_range],
-                                    x_label='Frequenz in [Hz]',
-                                    y_label='Absorptionsgrad',
-                                    title="Absorptionsgrad Plot")
+        fig1 = cached_figure(result_key, (LANGUAGE, plot_type, f_min, f_max, measured_key), lambda: overlay_measurement(
+            utils.plotly_go_line(
+                x=f_range,
+                y=alphas[f_range],
+                x_label='Frequenz in [Hz]',
+                y_label='Absorptionsgrad',
+                title="Absorptionsgrad Plot",
+                webgl=True,
+                max_points=2000)))
         st.plotly_chart(fig1)
 
         # DF anzeigen
         col1, col2 = st.columns(2)
         col1.subheader('Daten :books:')
-        df = pd.DataFrame({'Frequenz [Hz]': f_range, 'Absorptionsgrad [1]': alphas[f_range]})
-        st.dataframe(df, height=210)
+        df = cached_table(result_key, (LANGUAGE, plot_type, f_min, f_max, True), lambda: pd.DataFrame(
+            {'Frequenz [Hz]': f_range, 'Absorptionsgrad [1]': alphas[f_range]}))
+        if col1.toggle('Alle Frequenzen anzeigen'):
+            st.dataframe(df, height=210)
+        else:
+            st.dataframe(cached_table(result_key, (LANGUAGE, plot_type, f_min, f_max, False),
+                                      lambda: pd.DataFrame(dict(zip(df.columns, utils.decimate_minmax(
+                                          f_range, alphas[f_range], 250))))), height=210)
         col2.subheader('Herunterladen :arrow_heading_down:')
         with col2:
             export = utils.create_df_export_button(
@@ -151,19 +201,27 @@ try:
                 ts=None,
             )
     elif plot_type == 'Oktavbänder':
-        fig1 = utils.plotly_freq_bands(x=f_range_full,
-                                       y=alphas,
-                                       x_label='Frequenz in [Hz]',
-                                       y_label='Absorptionsgrad',
-                                       title="Absorptionsgrad Oktavbänder",
-                                       plot_type="oct")
+        fig1 = cached_figure(result_key, (LANGUAGE, plot_type, measured_key), lambda: overlay_measurement(
+            utils.plotly_freq_bands(
+                x=f_range_full,
+                y=alphas,
+                x_label='Frequenz in [Hz]',
+                y_label='Absorptionsgrad',
+                title="Absorptionsgrad Oktavbänder",
+                plot_type="oct"), bars=True))
         st.plotly_chart(fig1)
 
         # DF anzeigen
         col1, col2 = st.columns(2)
         col1.subheader('Daten :books:')
-        df = pd.DataFrame({'Frequenz [Hz]': f_range_full, 'Absorptionsgrad [1]': alphas})
-        st.dataframe(df, height=210)
+        df = cached_table(result_key, (LANGUAGE, plot_type, True),
+                          lambda: pd.DataFrame({'Frequenz [Hz]': f_range_full, 'Absorptionsgrad [1]': alphas}))
+        if col1.toggle('Alle Frequenzen anzeigen'):
+            st.dataframe(df, height=210)
+        else:
+            st.dataframe(cached_table(result_key, (LANGUAGE, plot_type, False), lambda: pd.DataFrame({
+                'Bandmittenfrequenz [Hz]': [band['center_frequency'] for band in bands.freq_bands('oct')],
+                'Absorptionsgrad [1]': bands.band_means(f_range_full, alphas, 'oct')})), height=210)
         col2.subheader('Herunterladen :arrow_heading_down:')
         with col2:
             export = utils.create_df_export_button(
@@ -172,19 +230,27 @@ try:
                 ts=None,
             )
     elif plot_type == 'Terzbänder':
-        fig1 = utils.plotly_freq_bands(x=f_range_full,
-                                       y=alphas,
-                                       x_label='Frequenz in [Hz]',
-                                       y_label='Absorptionsgrad',
-                                       title="Absorptionsgrad Terzbänder",
-                                       plot_type="third")
+        fig1 = cached_figure(result_key, (LANGUAGE, plot_type, measured_key), lambda: overlay_measurement(
+            utils.plotly_freq_bands(
+                x=f_range_full,
+                y=alphas,
+                x_label='Frequenz in [Hz]',
+                y_label='Absorptionsgrad',
+                title="Absorptionsgrad Terzbänder",
+                plot_type="third"), bars=True))
         st.plotly_chart(fig1)
 
         # DF anzeigen
         col1, col2 = st.columns(2)
         col1.subheader('Daten :books:')
-        df = pd.DataFrame({'Frequenz [Hz]': f_range_full, 'Absorptionsgrad [1]': alphas})
-        st.dataframe(df, height=210)
+        df = cached_table(result_key, (LANGUAGE, plot_type, True),
+                          lambda: pd.DataFrame({'Frequenz [Hz]': f_range_full, 'Absorptionsgrad [1]': alphas}))
+        if col1.toggle('Alle Frequenzen anzeigen'):
+            st.dataframe(df, height=210)
+        else:
+            st.dataframe(cached_table(result_key, (LANGUAGE, plot_type, False), lambda: pd.DataFrame({
+                'Bandmittenfrequenz [Hz]': [band['center_frequency'] for band in bands.freq_bands('third')],
+                'Absorptionsgrad [1]': bands.band_means(f_range_full, alphas, 'third')})), height=210)
         col2.subheader('Herunterladen :arrow_heading_down:')
         with col2:
             export = utils.create_df_export_button(
@@ -192,5 +258,71 @@ try:
                 title=f"Absorptionsgrad Berechnung",
                 ts=None,
             )
+
+    if measurement is not None:
+        st.subheader('Abweichung von der Messung :straight_ruler:')
+        col1, col2, col3 = st.columns(3)
+        col1.metric('Mittlere Abweichung', f"{measurement['bias']:+.3f}")
+        col2.metric('RMS-Abweichung', f"{measurement['rms']:.3f}")
+        col3.metric('Maximale Abweichung', f"{measurement['max']:.3f}")
+        measured_bands = measurement['counts'] > 0
+        st.dataframe(pd.DataFrame({
+            'Bandmittenfrequenz [Hz]': np.array(measurement['center_freqs'])[measured_bands],
+            'Messpunkte': measurement['counts'][measured_bands],
+            'Messung [1]': measurement['band_measured'][measured_bands],
+            'Modell [1]': measurement['band_model'][measured_bands],
+            'Mittlere Abweichung [1]': measurement['band_bias'][measured_bands],
+            'RMS-Abweichung [1]': measurement['band_rms'][measured_bands],
+            'Maximale Abweichung [1]': measurement['band_max'][measured_bands]}), height=210)
 except:
     pass
+
+profiler.stop()
+if profiler.path is not None:
+    with st.expander('Profil :stopwatch:'):
+        st.caption(f"Gespeichert unter {profiler.path}, {profiler.elapsed:.3f} s, "
+                   f"maximaler verfolgter Speicher {profiler.peak / 1024 ** 2:.1f} MB")
+        hot_functions = pd.DataFrame([list(function.values()) for function in profiler.hot],
+                                     columns=['Funktion', 'Aufrufe', 'Eigene Zeit [s]', 'Gesamtzeit [s]'])
+        st.dataframe(hot_functions, hide_index=True)
+
+################## Comparison Section ##################
+st.markdown('----')
+st.header('Vergleich :scales:')
+with st.expander('Vergleich ein/ausblenden...'):
+    col1, col2, col3 = st.columns(3)
+    stack_name = col1.text_input('Name des aktuellen Aufbaus', value=f"Aufbau {len(st.session_state.comparison) + 1}")
+    if col1.button('Aktuellen Aufbau hinzufügen') and len(materials) == num_materials:
+        st.session_state.comparison.append({'name': stack_name, 'materials': materials})
+    uploaded = col2.file_uploader('Aufbauten importieren (JSON)', type='json')
+    if uploaded is not None and col2.button('Importierte Aufbauten hinzufügen'):
+        try:
+            imported = [{'name': stack['name'], 'materials': stack['materials']} for stack in json.load(uploaded)]
+            st.session_state.comparison.extend(imported)
+        except (ValueError, KeyError, TypeError):
+            st.error('Ungültige Datei')
+    if col3.button('Vergleich leeren'):
+        st.session_state.comparison = []
+
+    if st.session_state.comparison:
+        names = [stack['name'] for stack in st.session_state.comparison]
+        alphas_compare = compare_stacks([stack['materials'] for stack in st.session_state.comparison], f_range_full,
+                                        air_density, air_speed, viscosity, air_pressure, theta)
+        fig2 = utils.plotly_go_lines(x=f_range,
+                                     ys=alphas_compare[:, f_range],
+                                     names=names,
+                                     x_label='Frequenz in [Hz]',
+                                     y_label='Absorptionsgrad',
+                                     title="Vergleich des Absorptionsgrads")
+        st.plotly_chart(fig2)
+
+        st.subheader('Bandwerte :books:')
+        band_type = 'third' if plot_type == 'Terzbänder' else 'oct'
+        df_bands = pd.DataFrame(bands.band_means(f_range_full, alphas_compare, band_type),
+                                index=names,
+                                columns=[band['center_frequency'] for band in bands.freq_bands(band_type)])
+        st.dataframe(df_bands)
+
+        st.subheader('Einzahlwerte :trophy:')
+        df_ratings = pd.DataFrame(ratings.ratings(alphas_compare, f_range_full), index=names)
+        st.dataframe(df_ratings)
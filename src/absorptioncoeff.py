@@ -1,19 +1,103 @@
+import hashlib
+import json
+from functools import cached_property
+
 import numpy as np
 
+from . import kernels, models, profiling
+
+
+TERMINATIONS = ('rigid', 'anechoic')
+CHAIN_METHODS = ('auto', 'sequential', 'tree')
+# limits of the tree reduction and of the layer batched evaluation, see dev/bench_chain.py: both save per-call
+# overhead, which only dominates for many layers with few frequencies each. The layer batched evaluation breaks even
+# at about 512 frequencies, independent of the number of layers.
+TREE_MIN_LAYERS = 16
+TREE_MAX_MATRICES = 512
+LAYER_BATCH_MAX_FREQUENCIES = 256
+LAYER_BATCH_MAX_ELEMENTS = 131072
+
+
+def matmul2(A, B):
+    """Product of 2x2 matrices with shapes (..., 2, 2), written out element-wise, which is several times faster than
+    np.matmul for stacks of 2x2 matrices."""
+    A, B = np.asarray(A), np.asarray(B)
+    T = np.empty(np.broadcast_shapes(A.shape, B.shape), dtype=np.result_type(A, B))
+    a, b, c, d = A[..., 0, 0], A[..., 0, 1], A[..., 1, 0], A[..., 1, 1]
+    e, f, g, h = B[..., 0, 0], B[..., 0, 1], B[..., 1, 0], B[..., 1, 1]
+    T[..., 0, 0] = a * e + b * g
+    T[..., 0, 1] = a * f + b * h
+    T[..., 1, 0] = c * e + d * g
+    T[..., 1, 1] = c * f + d * h
+    return T
+
+
+def chain_product(T, method='auto'):
+    """Multiplies the transfer matrices of the layers in their order.
+
+    The sequential fold needs one matrix product per layer and holds only one layer in memory when T is a generator.
+    The tree reduction multiplies neighbouring pairs of all layers at once, which needs about log2(L) vectorized
+    products for L layers, e.g. for graded media discretized into hundreds of thin sublayers.
+
+    Args:
+        T (iterable): Transfer matrices of the layers, each of shape (..., 2, 2), or an array of shape (L, ..., 2, 2)
+        method (str, optional): 'sequential', 'tree' or 'auto', which uses the tree reduction for sequences of at least
+            TREE_MIN_LAYERS layers with at most TREE_MAX_MATRICES matrices each, and the sequential fold otherwise, in
+            particular for generators
+
+    Returns:
+        np.ndarray: Total transfer matrix
+    """
+    if method not in CHAIN_METHODS:
+        raise ValueError(f"Invalid Chain Method: {method}")
+    if method == 'auto':
+        method = 'sequential'
+        if hasattr(T, '__len__') and len(T) >= TREE_MIN_LAYERS:
+            shape = T.shape[1:] if isinstance(T, np.ndarray) else np.broadcast_shapes(*(np.shape(t) for t in T))
+            if np.prod(shape[:-2], dtype=int) <= TREE_MAX_MATRICES:
+                method = 'tree'
+
+    if method == 'sequential':
+        T_total = None
+        for T_layer in T:
+            T_total = T_layer if T_total is None else matmul2(T_total, T_layer)
+        return T_total
+
+    layers = T if isinstance(T, np.ndarray) else np.stack(np.broadcast_arrays(*T))
+    while len(layers) > 1:
+        products = matmul2(layers[0:len(layers) - 1:2], layers[1::2])
+        layers = np.concatenate([products, layers[-1:]]) if len(layers) % 2 else products
+    return layers[0]
+
 
 class AbsorptionCoeff:
     """Absorption coefficient calculator for a given frequency range and a given angle of incidence.
 
     Args:
-        T (list): List of Transfer Matrices.
+        T (iterable): Transfer Matrices of the layers, each of shape (2, 2) for a single frequency or (N, 2, 2) for
+            N frequencies. A generator may be passed, in which case only one layer is held in memory at a time.
         Z0 (float): Impedance of the air.
         theta (float): Angle of incidence in degrees.
+        termination (str, optional): 'rigid' for a rigid backing, 'anechoic' for air behind the last layer
+        chain_method (str, optional): Method of the chain product, see chain_product
     """
 
-    def __init__(self, T, Z0, theta):
+    def __init__(self, T, Z0, theta, termination='rigid', chain_method='auto'):
+        if termination not in TERMINATIONS:
+            raise ValueError(f"Invalid Termination: {termination}")
         self.T = T
         self.Z0 = Z0
         self.theta = theta
+        self.termination = termination
+        self.chain_method = chain_method
+
+    def solve(self):
+        """Multiplies the transfer matrices of the layers once.
+
+        Returns:
+            AbsorptionResult: All outputs derived from the total transfer matrix
+        """
+        return AbsorptionResult(chain_product(self.T, self.chain_method), self.Z0, self.theta, self.termination)
 
     def abs_coeff(self):
         """Function that calculates the absorption coefficient
@@ -22,13 +106,209 @@ class AbsorptionCoeff:
             self : Object of the class AbsorptionCoeff
 
         Returns:
-            alpha (float): Absorption coefficient
+            alpha (float | np.ndarray): Absorption coefficient, one value per frequency
         """
-        T_total = self.T[0]
-        for i in range(1, len(self.T)):
-            T_total = np.matmul(T_total, self.T[i])
-
-        R = (T_total[0, 0] * np.cos(self.theta) - self.Z0 * T_total[1, 0]) / (
-                    T_total[0, 0] * np.cos(self.theta) + self.Z0 * T_total[1, 0])
-        alpha = 1 - (np.abs(R) ** 2)
-        return alpha
+        return self.solve().alpha
+
+
+class AbsorptionResult:
+    """Outputs of a transfer matrix calculation.
+
+    Every output is derived from the total transfer matrix when it is first accessed and then kept, so no output
+    requires another pass over the layers.
+
+    Args:
+        T_total (np.ndarray): Total transfer matrix with shape (..., 2, 2)
+        Z0 (float): Impedance of the air.
+        theta (float): Angle of incidence in radians.
+        termination (str, optional): 'rigid' for a rigid backing, 'anechoic' for air behind the last layer
+    """
+
+    def __init__(self, T_total, Z0, theta, termination='rigid'):
+        self.T_total = T_total
+        self.Z0 = Z0
+        self.theta = theta
+        self.termination = termination
+
+    @cached_property
+    def Zs(self):
+        """Surface impedance of the stack."""
+        T11, T12, T21, T22 = (self.T_total[..., i, j] for i in (0, 1) for j in (0, 1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.termination == 'rigid':
+                return T11 / T21
+            Z_end = self.Z0 / np.cos(self.theta)
+            return (T11 * Z_end + T12) / (T21 * Z_end + T22)
+
+    @cached_property
+    def R(self):
+        """Complex reflection coefficient."""
+        if self.termination == 'rigid':
+            # written with the matrix elements, so that stacks without a shunt element (T21 = 0) give R = 1
+            T11, T21 = self.T_total[..., 0, 0], self.T_total[..., 1, 0]
+            return (T11 * np.cos(self.theta) - self.Z0 * T21) / (T11 * np.cos(self.theta) + self.Z0 * T21)
+        return (self.Zs * np.cos(self.theta) - self.Z0) / (self.Zs * np.cos(self.theta) + self.Z0)
+
+    @cached_property
+    def alpha(self):
+        """Absorption coefficient, for an anechoic termination including the transmitted energy."""
+        return 1 - (np.abs(self.R) ** 2)
+
+    @cached_property
+    def tau(self):
+        """Transmission coefficient, only defined for an anechoic termination."""
+        if self.termination != 'anechoic':
+            raise ValueError("The transmission coefficient requires an anechoic termination")
+        T11, T12, T21, T22 = (self.T_total[..., i, j] for i in (0, 1) for j in (0, 1))
+        Z_end = self.Z0 / np.cos(self.theta)
+        return np.abs(2 / (T11 + T12 / Z_end + T21 * Z_end + T22)) ** 2
+
+    @cached_property
+    def transmission_loss(self):
+        """Transmission loss in dB, only defined for an anechoic termination."""
+        return -10 * np.log10(self.tau)
+
+
+def solve(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision='double', backend=None,
+          workers=None, profile=None):
+    """Calculates the absorption coefficient of a stack of materials for all given frequencies at once.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        precision (str, optional): 'double' for complex128, 'single' for the complex64 fast path
+        backend (str, optional): 'numpy' or 'numba', defaults to kernels.get_backend(). The compiled numba kernels
+            only run in double precision and for scalar air properties, otherwise the NumPy models are used.
+        workers (int, optional): Number of threads for the NumPy backend, see parallel.solve_threaded. By default
+            the calculation runs in the calling thread.
+        profile (bool, optional): Capture a profile of the calculation with profiling.Profile, defaults to the
+            environment variable ABSORPTION_PROFILE
+
+    Returns:
+        alpha (np.ndarray): Absorption coefficient for each frequency
+    """
+    if profile or (profile is None and profiling.is_enabled()):
+        with profiling.Profile('solve', enabled=True):
+            return solve(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision, backend,
+                         workers, profile=False)
+    if backend is None:
+        backend = kernels.get_backend()
+    # conditions given as arrays, see air.solve_conditions, broadcast in the NumPy models only
+    scalar_air = all(np.ndim(value) == 0 for value in (air_density, air_speed, viscosity, air_pressure))
+    if backend == 'numba' and precision == 'double' and scalar_air:
+        return kernels.abs_coeff(materials, f, air_density, air_speed, viscosity, air_pressure, theta)
+    if backend not in kernels.BACKENDS:
+        raise ValueError(f"Invalid Backend: {backend}")
+    if workers is not None:
+        from . import parallel
+        return parallel.solve_threaded(materials, f, air_density, air_speed, viscosity, air_pressure, theta,
+                                       workers=workers, precision=precision)
+
+    Z0 = air_speed * air_density
+    if (len(materials) >= TREE_MIN_LAYERS and scalar_air and np.ndim(f) == 1 and len(f) <= LAYER_BATCH_MAX_FREQUENCIES
+            and len(materials) * len(f) <= LAYER_BATCH_MAX_ELEMENTS):
+        return _solve_layer_batched(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision)
+    T = (models.transfer_matrix(material, f, air_density, air_speed, viscosity, air_pressure, theta, precision)
+         for material in materials)
+    return AbsorptionCoeff(T, Z0, theta).abs_coeff()
+
+
+def _solve_layer_batched(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision):
+    """solve for many layers with few frequencies, e.g. graded media discretized into thin sublayers.
+
+    All layers of the same model are evaluated in one call along the layer axis, and the chain product is reduced with
+    chain_product.
+    """
+    from .compare import population_layer, topology
+
+    groups = {}
+    for l, material in enumerate(materials):
+        groups.setdefault(topology([material]), []).append(l)
+
+    T = np.empty((len(materials), len(f), 2, 2), dtype=models.PRECISIONS[precision])
+    for indices in groups.values():
+        T[indices] = models.transfer_matrix(population_layer([materials[l] for l in indices]), f, air_density,
+                                            air_speed, viscosity, air_pressure, theta, precision)
+    return AbsorptionCoeff(T, air_speed * air_density, theta).abs_coeff()
+
+
+def solve_result(materials, f, air_density, air_speed, viscosity, air_pressure, theta, termination='rigid',
+                 precision='double'):
+    """Calculates the total transfer matrix of a stack once and returns all outputs derived from it.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        termination (str, optional): 'rigid' for a rigid backing, 'anechoic' for air behind the last layer
+        precision (str, optional): 'double' for complex128, 'single' for the complex64 fast path
+
+    Returns:
+        AbsorptionResult: Total transfer matrix, reflection coefficient, surface impedance, absorption coefficient
+            and, for an anechoic termination, transmission coefficient and transmission loss
+    """
+    Z0 = air_speed * air_density
+    T = (models.transfer_matrix(material, f, air_density, air_speed, viscosity, air_pressure, theta, precision)
+         for material in materials)
+    return AbsorptionCoeff(T, Z0, theta, termination).solve()
+
+
+def precision_deviation(materials, f, air_density, air_speed, viscosity, air_pressure, theta, sample_size=256):
+    """Estimates the error of the single precision fast path against the double precision result.
+
+    Both precisions are evaluated on an evenly spaced sample of the frequencies.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        sample_size (int, optional): Number of frequencies in the sample
+
+    Returns:
+        float: Maximum absolute deviation of the absorption coefficient
+    """
+    f = np.asarray(f)
+    f_sample = f[np.unique(np.linspace(0, len(f) - 1, min(sample_size, len(f))).astype(int))]
+    args = (materials, f_sample, air_density, air_speed, viscosity, air_pressure, theta)
+    return float(np.max(np.abs(solve(*args, precision='single') - solve(*args, precision='double', backend='numpy'))))
+
+
+def stack_hash(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision='double'):
+    """Canonical hash of a calculation, identical inputs give identical hashes.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        precision (str, optional): Working precision, 'double' or 'single'
+
+    Returns:
+        str: Hexadecimal SHA-256 digest
+    """
+    spec = {
+        'materials': [[str(material[0])] + [value if isinstance(value, str) else float(value)
+                                            for value in material[1:]] for material in materials],
+        'air': [float(air_density), float(air_speed), float(viscosity), float(air_pressure)],
+        'theta': float(theta),
+        'precision': precision,
+    }
+    digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode('utf-8'))
+    digest.update(np.ascontiguousarray(f, dtype=np.float64).tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,91 @@
+import numpy as np
+
+from . import absorptioncoeff
+
+R_DRY_AIR = 287.058
+MOLAR_MASS_DRY_AIR = 0.0289652
+MOLAR_MASS_WATER = 0.018016
+# molar heat capacities at constant pressure in J/(mol K) and the universal gas constant
+CP_DRY_AIR = 29.12
+CP_WATER = 33.58
+R_UNIVERSAL = 8.314462618
+
+
+def saturation_vapour_pressure(temperature):
+    """Saturation vapour pressure of water over a plane water surface (Magnus formula).
+
+    Args:
+        temperature (float | np.ndarray): Air temperature in °C
+
+    Returns:
+        float | np.ndarray: Saturation vapour pressure in Pa
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    return 610.94 * np.exp(17.625 * temperature / (temperature + 243.04))
+
+
+def air_properties(temperature, air_pressure, humidity=None):
+    """Density, speed of sound and viscosity of air, for scalars or arrays of conditions.
+
+    All arguments are broadcast against each other, e.g. temperatures of shape (T, 1) and pressures of shape (P,) give
+    properties of shape (T, P). Without humidity, dry air is assumed, as in the calculator pages. With humidity, the
+    density is that of the mixture of dry air and water vapour and the speed of sound is corrected for the molar mass
+    and heat capacity ratio of the mixture. The viscosity is that of dry air (Sutherland's law), the influence of
+    humidity on it is below one percent.
+
+    Args:
+        temperature (float | np.ndarray): Air temperature in °C
+        air_pressure (float | np.ndarray): Air pressure in Pa
+        humidity (float | np.ndarray, optional): Relative humidity in percent
+
+    Returns:
+        tuple: Density of air, speed of sound and viscosity of air
+    """
+    temperature, air_pressure = np.asarray(temperature, dtype=float), np.asarray(air_pressure, dtype=float)
+    kelvin = temperature + 273.15
+    air_density = air_pressure / (R_DRY_AIR * kelvin)
+    air_speed = 331.3 * np.sqrt(1 + (temperature / 273.15))
+    viscosity = (1.458 * 10 ** (-6) * kelvin ** (3 / 2)) / (kelvin + 110.4)
+
+    if humidity is not None:
+        vapour_pressure = np.asarray(humidity, dtype=float) / 100 * saturation_vapour_pressure(temperature)
+        x_water = vapour_pressure / air_pressure
+        air_density = air_density * (1 - x_water * (1 - MOLAR_MASS_WATER / MOLAR_MASS_DRY_AIR))
+
+        molar_mass = (1 - x_water) * MOLAR_MASS_DRY_AIR + x_water * MOLAR_MASS_WATER
+        cp = (1 - x_water) * CP_DRY_AIR + x_water * CP_WATER
+        gamma = cp / (cp - R_UNIVERSAL)
+        gamma_dry = CP_DRY_AIR / (CP_DRY_AIR - R_UNIVERSAL)
+        air_speed = air_speed * np.sqrt(gamma / gamma_dry * MOLAR_MASS_DRY_AIR / molar_mass)
+        viscosity = np.broadcast_to(viscosity, np.shape(air_speed))
+
+    if np.ndim(air_density) == 0:
+        return float(air_density), float(air_speed), float(viscosity)
+    return air_density, air_speed, viscosity
+
+
+def solve_conditions(materials, f, temperature, air_pressure, theta, humidity=None, precision='double'):
+    """Calculates the absorption coefficient for many environmental conditions in one batched computation.
+
+    The conditions are broadcast against each other and get a trailing axis for the frequencies, so all conditions
+    and frequencies are evaluated in one pass through the models.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        temperature (float | np.ndarray): Air temperature in °C
+        air_pressure (float | np.ndarray): Air pressure in Pa
+        theta (float): Angle of incidence in radians
+        humidity (float | np.ndarray, optional): Relative humidity in percent, dry air if not given
+        precision (str, optional): Working precision, 'double' or 'single'
+
+    Returns:
+        np.ndarray: Absorption coefficient with the broadcast shape of the conditions plus the frequency axis
+    """
+    conditions = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in
+                                       (temperature, air_pressure, 0 if humidity is None else humidity)))
+    temperature, air_pressure, humidity_values = (value[..., None] for value in conditions)
+    air_density, air_speed, viscosity = air_properties(temperature, air_pressure,
+                                                       None if humidity is None else humidity_values)
+    alpha = absorptioncoeff.solve(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision)
+    return np.broadcast_to(alpha, conditions[0].shape + (np.size(f),))
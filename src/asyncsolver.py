@@ -0,0 +1,111 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import absorptioncoeff
+from .parallel import default_workers
+from .pipeline import DEFAULT_CHUNK_SIZE, frequency_chunks
+
+
+class AsyncSolver:
+    """Asyncio front end of the solver for serving many users at once.
+
+    The calculations run on a bounded thread pool, so the event loop stays responsive. Identical requests that are in
+    flight at the same time are computed only once, and a calculation is cancelled as soon as nobody waits for it
+    anymore. The frequencies are computed in blocks, so a cancellation takes effect after the current block.
+
+    Args:
+        max_workers (int, optional): Number of threads, defaults to parallel.default_workers()
+        chunk_size (int, optional): Maximum number of frequencies per block
+    """
+
+    def __init__(self, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.executor = ThreadPoolExecutor(max_workers or default_workers())
+        self.chunk_size = chunk_size
+        self._in_flight = {}
+        self._waiters = {}
+        self._latest = {}
+
+    async def solve(self, materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision='double',
+                    backend=None):
+        """Calculates the absorption coefficient without blocking the event loop.
+
+        Args:
+            materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+            f (np.ndarray): Frequencies
+            air_density (float): Density of air
+            air_speed (float): Speed of air
+            viscosity (float): Viscosity of air
+            air_pressure (float): Air pressure
+            theta (float): Angle of incidence in radians
+            precision (str, optional): Working precision, 'double' or 'single'
+            backend (str, optional): 'numpy' or 'numba', see absorptioncoeff.solve
+
+        Returns:
+            alpha (np.ndarray): Absorption coefficient for each frequency
+        """
+        args = (materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision, backend)
+        key = absorptioncoeff.stack_hash(*args[:-1])
+        task = self._in_flight.get(key)
+        # a task that is being cancelled is not shared, it would raise CancelledError in the new request
+        if task is None or task.done() or task.cancelling():
+            task = asyncio.ensure_future(self._run(*args))
+            self._in_flight[key] = task
+            self._waiters[task] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        self._waiters[task] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters[task] == 1:
+                if self._in_flight.get(key) is task:
+                    del self._in_flight[key]
+                task.cancel()
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    async def solve_latest(self, channel, *args, **kwargs):
+        """Like solve, but cancels the previous request of the same channel.
+
+        Use one channel per user session, so a calculation whose inputs have changed meanwhile is abandoned.
+
+        Args:
+            channel (hashable): Identifier of the requesting session
+            *args: Arguments of solve
+            **kwargs: Keyword arguments of solve
+
+        Returns:
+            alpha (np.ndarray): Absorption coefficient for each frequency
+        """
+        previous = self._latest.get(channel)
+        if previous is not None and not previous.done():
+            previous.cancel()
+        request = asyncio.ensure_future(self.solve(*args, **kwargs))
+        self._latest[channel] = request
+        try:
+            return await request
+        finally:
+            if self._latest.get(channel) is request:
+                del self._latest[channel]
+
+    def shutdown(self):
+        """Stops the thread pool after the running blocks have finished."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision, backend):
+        loop = asyncio.get_running_loop()
+        alphas = []
+        for f_chunk in frequency_chunks(f, self.chunk_size):
+            alphas.append(await loop.run_in_executor(self.executor, absorptioncoeff.solve, materials, f_chunk,
+                                                     air_density, air_speed, viscosity, air_pressure, theta,
+                                                     precision, backend))
+        return np.concatenate(alphas) if alphas else np.array([])
+
+    def _forget(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        self._waiters.pop(task, None)
@@ -0,0 +1,124 @@
+import numpy as np
+
+OCTAVE_CENTER_FREQS = [31.5, 63, 125, 250, 500, 1000, 2000, 4000, 8000, 16000]
+THIRD_OCTAVE_CENTER_FREQS = [25, 31.5, 40, 50, 63, 80, 100, 125, 160, 200,
+                             250, 315, 400, 500, 630, 800, 1000, 1250, 1600, 2000,
+                             2500, 3150, 4000, 5000, 6300, 8000, 10000, 12500, 16000, 20000]
+
+
+def freq_bands(plot_type='oct', standard=False):
+    """Returns the frequency bands used for the band plots.
+
+    The bands of the plots reach from fc / 2 to 2 fc for octaves and from fc / 3 to 3 fc for third octaves, so that
+    neighbouring bands overlap. Standard bands reach from fc * 2^(-1/2n) to fc * 2^(1/2n) for 1/n octaves, as the
+    single number ratings require.
+
+    Args:
+        plot_type (str, optional): Type of bands. Options are 'oct' and 'third'.
+        standard (bool, optional): Standard band widths instead of the bands of the plots
+
+    Returns:
+        list: One dict per band with the center, lower cutoff and upper cutoff frequency
+    """
+    if plot_type == 'oct':
+        center_freqs = OCTAVE_CENTER_FREQS
+        bw_factor = 2 ** (1 / 2) if standard else 2
+    elif plot_type == 'third':
+        center_freqs = THIRD_OCTAVE_CENTER_FREQS
+        bw_factor = 2 ** (1 / 6) if standard else 3
+    else:
+        raise ValueError("Invalid Plot Type")
+
+    freq_bands = []
+
+    for center_freq in center_freqs:
+        lower_cutoff = center_freq / bw_factor
+        upper_cutoff = center_freq * bw_factor
+
+        freq_band = {
+            "center_frequency": center_freq,
+            "lower_cutoff_frequency": lower_cutoff,
+            "upper_cutoff_frequency": upper_cutoff
+        }
+
+        freq_bands.append(freq_band)
+
+    return freq_bands
+
+
+def band_means(x, y, plot_type='oct', standard=False):
+    """Calculates the mean value of y in each frequency band.
+
+    Args:
+        x (np.ndarray): Frequencies
+        y (np.ndarray): Values, the frequency has to be the last axis
+        plot_type (str, optional): Type of bands. Options are 'oct' and 'third'.
+        standard (bool, optional): Standard band widths instead of the bands of the plots, see freq_bands
+
+    Returns:
+        np.ndarray: Mean value per band, 0 for bands without frequencies
+    """
+    accumulator = BandAccumulator(plot_type, standard)
+    accumulator.update(x, y)
+    return accumulator.means()
+
+
+class BandAccumulator:
+    """Running per-band sums, counts, minima and maxima, so that band statistics can be built from frequency chunks.
+
+    Args:
+        plot_type (str, optional): Type of bands. Options are 'oct' and 'third'.
+        standard (bool, optional): Standard band widths instead of the bands of the plots, see freq_bands
+    """
+
+    def __init__(self, plot_type='oct', standard=False):
+        self.bands = freq_bands(plot_type, standard)
+        self.center_freqs = [band['center_frequency'] for band in self.bands]
+        self.sums = None
+        self.mins = None
+        self.maxs = None
+        self.counts = np.zeros(len(self.bands), dtype=int)
+
+    def update(self, x, y):
+        """Adds a chunk of frequencies and values to the running statistics.
+
+        Args:
+            x (np.ndarray): Frequencies of the chunk
+            y (np.ndarray): Values of the chunk, the frequency has to be the last axis
+        """
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if self.sums is None:
+            shape = y.shape[:-1] + (len(self.bands),)
+            self.sums = np.zeros(shape)
+            self.mins = np.full(shape, np.inf)
+            self.maxs = np.full(shape, -np.inf)
+
+        for i, band in enumerate(self.bands):
+            in_band = (x >= band['lower_cutoff_frequency']) & (x <= band['upper_cutoff_frequency'])
+            count = np.count_nonzero(in_band)
+            if not count:
+                continue
+            values = y[..., in_band]
+            self.sums[..., i] += values.sum(axis=-1)
+            np.minimum(self.mins[..., i], values.min(axis=-1), out=self.mins[..., i])
+            np.maximum(self.maxs[..., i], values.max(axis=-1), out=self.maxs[..., i])
+            self.counts[i] += count
+
+    def means(self):
+        """Returns the mean value per band, 0 for bands without frequencies."""
+        if self.sums is None:
+            return np.zeros(len(self.bands))
+        return np.divide(self.sums, self.counts, out=np.zeros_like(self.sums), where=self.counts > 0)
+
+    def minima(self):
+        """Returns the minimum value per band, 0 for bands without frequencies."""
+        if self.mins is None:
+            return np.zeros(len(self.bands))
+        return np.where(self.counts > 0, self.mins, 0)
+
+    def maxima(self):
+        """Returns the maximum value per band, 0 for bands without frequencies."""
+        if self.maxs is None:
+            return np.zeros(len(self.bands))
+        return np.where(self.counts > 0, self.maxs, 0)
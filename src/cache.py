@@ -0,0 +1,147 @@
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from . import absorptioncoeff
+
+CACHE_DIR_VARIABLE = 'ABSORPTION_CACHE_DIR'
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+_default_cache = None
+
+
+class DiskCache:
+    """Content addressed cache of results in compressed NPZ files, shared by all processes using the same directory.
+
+    Files are written to a temporary file and renamed, so readers never see partial results. The access time of a
+    result is its modification time, which is updated on every hit. When the size of the directory exceeds max_bytes,
+    the least recently used results are deleted. Results deleted by another process meanwhile are cache misses, and
+    errors writing the cache are ignored, so the cache never makes a calculation fail.
+
+    Args:
+        directory (str): Directory of the cache, created if needed
+        max_bytes (int, optional): Maximum total size of the cached files
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        """Path of the file of a key."""
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """Returns the cached arrays of a key, None if it is not cached.
+
+        Args:
+            key (str): Key of the result, e.g. absorptioncoeff.stack_hash
+
+        Returns:
+            dict: Arrays by name
+        """
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return None
+        return arrays
+
+    def put(self, key, **arrays):
+        """Stores arrays under a key and evicts the least recently used results if the cache is too large.
+
+        Args:
+            key (str): Key of the result
+            **arrays: Arrays by name
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(handle, 'wb') as file:
+                    np.savez_compressed(file, **arrays)
+                os.replace(temp_path, self.path(key))
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self):
+        """Deletes the least recently used results until the cache fits into max_bytes."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.npz'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Deletes all cached results."""
+        max_bytes, self.max_bytes = self.max_bytes, -1
+        try:
+            self.evict()
+        except FileNotFoundError:
+            pass
+        finally:
+            self.max_bytes = max_bytes
+
+
+def default_cache():
+    """Cache in the directory given by the environment variable ABSORPTION_CACHE_DIR, defaults to
+    ~/.cache/absorption-coefficient."""
+    global _default_cache
+    if _default_cache is None:
+        directory = os.environ.get(CACHE_DIR_VARIABLE,
+                                   os.path.join(os.path.expanduser('~'), '.cache', 'absorption-coefficient'))
+        _default_cache = DiskCache(directory)
+    return _default_cache
+
+
+def cached_solve(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision='double', cache=None,
+                 solver=None):
+    """Like absorptioncoeff.solve, but the result is looked up in and stored to a disk cache.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        precision (str, optional): Working precision, 'double' or 'single'
+        cache (DiskCache, optional): Cache, defaults to default_cache()
+        solver (callable, optional): Function with the arguments of absorptioncoeff.solve calculating the results
+            missing in the cache, e.g. library.MaterialLibrary.solve, defaults to absorptioncoeff.solve
+
+    Returns:
+        alpha (np.ndarray): Absorption coefficient for each frequency
+    """
+    cache = cache or default_cache()
+    key = absorptioncoeff.stack_hash(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision)
+    cached = cache.get(key)
+    if cached is not None and 'alpha' in cached:
+        return cached['alpha']
+    solver = solver or absorptioncoeff.solve
+    alpha = solver(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision)
+    cache.put(key, alpha=alpha)
+    return alpha
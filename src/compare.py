@@ -0,0 +1,107 @@
+import numpy as np
+
+from . import models
+from .absorptioncoeff import AbsorptionCoeff
+
+
+def topology(materials):
+    """Returns the sequence of model names and model options of a stack, stacks with the same topology can be
+    batched."""
+    return tuple((material[0],) + tuple(value for value in material[1:] if isinstance(value, str))
+                 for material in materials)
+
+
+def population_layer(layers):
+    """Combines layers of the same model into one layer of a population.
+
+    Every numeric parameter becomes a column of shape (P, 1), which broadcasts against the frequencies in the models,
+    so that models.transfer_matrix returns the transfer matrices of all P layers with shape (P, N, 2, 2) in one call.
+    Model options like the porous model are shared by all layers.
+
+    Args:
+        layers (list): Layers with the same model, see models.transfer_matrix for the format of each layer
+
+    Returns:
+        list: Layer with the model name and the parameter columns
+    """
+    if len(set(topology(layers))) != 1:
+        raise ValueError("All layers of a population need the same model")
+    return [layers[0][0]] + [values[0] if isinstance(values[0], str) else np.array(values, dtype=float)[:, None]
+                             for values in zip(*(layer[1:] for layer in layers))]
+
+
+def solve_population(stacks, f, air_density, air_speed, viscosity, air_pressure, theta, layer_cache=None,
+                     precision='double'):
+    """Calculates the absorption coefficient of stacks that share one topology in one batched pass.
+
+    At each position of the stack, layers that are identical for all stacks are evaluated once and broadcast, the
+    others are evaluated in one population-batched call. Transfer matrices of layers found in layer_cache are reused.
+
+    Args:
+        stacks (list): Stacks with the same topology, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        layer_cache (dict, optional): Transfer matrices of single layers by layer, only valid for one set of
+            frequencies, air conditions and angle. It is filled with the newly evaluated layers.
+        precision (str, optional): Working precision of the transfer matrices, 'double' or 'single'
+
+    Returns:
+        np.ndarray: Absorption coefficient with shape (P, N)
+    """
+    if len({topology(materials) for materials in stacks}) != 1:
+        raise ValueError("All stacks of a population need the same topology")
+    if layer_cache is None:
+        layer_cache = {}
+
+    def position_matrices():
+        for layers in zip(*stacks):
+            keys = [tuple(layer) for layer in layers]
+            missing = [key for key in dict.fromkeys(keys) if key not in layer_cache]
+            if missing:
+                T = models.transfer_matrix(population_layer(missing), f, air_density, air_speed, viscosity,
+                                           air_pressure, theta, precision)
+                layer_cache.update(zip(missing, T))
+            if len(set(keys)) == 1:
+                yield layer_cache[keys[0]]
+            else:
+                yield np.stack([layer_cache[key] for key in keys])
+
+    alpha = AbsorptionCoeff(position_matrices(), air_speed * air_density, theta).abs_coeff()
+    return np.broadcast_to(alpha, (len(stacks), np.size(f)))
+
+
+def compare_stacks(stacks, f, air_density, air_speed, viscosity, air_pressure, theta, layer_cache=None,
+                   precision='double'):
+    """Calculates the absorption coefficient of many candidate stacks.
+
+    The stacks are grouped by topology and each group is calculated with solve_population, sharing one layer cache.
+
+    Args:
+        stacks (list): Stacks of materials, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        layer_cache (dict, optional): See solve_population
+        precision (str, optional): Working precision of the transfer matrices, 'double' or 'single'
+
+    Returns:
+        np.ndarray: Absorption coefficient with shape (P, N), in the order of the stacks
+    """
+    if layer_cache is None:
+        layer_cache = {}
+    groups = {}
+    for i, materials in enumerate(stacks):
+        groups.setdefault(topology(materials), []).append(i)
+
+    alphas = np.empty((len(stacks), np.size(f)))
+    for indices in groups.values():
+        alphas[indices] = solve_population([stacks[i] for i in indices], f, air_density, air_speed, viscosity,
+                                           air_pressure, theta, layer_cache, precision)
+    return alphas
@@ -0,0 +1,318 @@
+"""Resumable, shardable parameter sweeps, run with `python -m src.jobs`.
+
+A job is a JSON file:
+
+    {
+        "materials": [["Porous", 50, 10000, 0.98, 1.01], ["Air", 50]],
+        "sweep": [
+            {"layer": 0, "parameter": "thickness", "values": [20, 40, 60, 80, 100]},
+            {"layer": 0, "parameter": "sigma", "start": 5000, "stop": 50000, "num": 10},
+            {"layer": 1, "parameter": "thickness", "start": 0, "stop": 200, "num": 21}
+        ],
+        "f": {"start": 1, "stop": 20000, "step": 1},
+        "temperature": 20, "air_pressure": 101325, "humidity": null,
+        "theta": 0,
+        "output": "bands",
+        "block_size": 256
+    }
+
+The configurations are all combinations of the swept values, in C order of the sweep list. They are split into
+blocks of block_size configurations, and every block is saved to its own file as soon as it is calculated. Shard i of
+n runs the i-th of n contiguous parts of the blocks, so shards can run independently on different machines sharing
+the directory, and a killed shard resumes with the first block that is not saved. The blocks of the job are merged
+into one NPZ file once all shards are finished:
+
+    python -m src.jobs run sweep.json --shard 1/4
+    python -m src.jobs status sweep.json
+    python -m src.jobs merge sweep.json
+
+With "output": "bands" the octave and third octave band mean, minimum and maximum and the single number ratings of
+every configuration are stored, with "output": "alpha" the full absorption coefficient.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from . import library, ratings
+from .air import air_properties
+from .bands import BandAccumulator
+from .uncertainty import DEFAULT_MAX_ELEMENTS, parameter_index, solve_samples
+
+DEFAULT_BLOCK_SIZE = 256
+OUTPUTS = ('bands', 'alpha')
+
+
+def load_job(path):
+    """Loads and validates a job file, see parse_job."""
+    with open(path, encoding='utf-8') as file:
+        return parse_job(json.load(file))
+
+
+def parse_job(job):
+    """Validates a job and fills in the defaults.
+
+    Args:
+        job (dict): Decoded JSON job, see the module documentation
+
+    Returns:
+        dict: Job with the keys of the module documentation, and the frequencies and the values of every swept
+            parameter as lists
+    """
+    if not isinstance(job, dict) or not isinstance(job.get('materials'), list) or not job['materials']:
+        raise ValueError("The job needs a non-empty list 'materials'")
+    if not isinstance(job.get('sweep'), list) or not job['sweep']:
+        raise ValueError("The job needs a non-empty list 'sweep'")
+
+    sweep = []
+    for entry in job['sweep']:
+        parameter_index(job['materials'], entry['layer'], entry['parameter'])
+        if 'values' in entry:
+            values = np.asarray(entry['values'], dtype=float)
+        else:
+            values = np.linspace(entry['start'], entry['stop'], entry['num'])
+        if values.ndim != 1 or not len(values):
+            raise ValueError(f"Invalid Sweep: no values for {entry['parameter']} of layer {entry['layer']}")
+        sweep.append({'layer': entry['layer'], 'parameter': entry['parameter'], 'values': values.tolist()})
+
+    f = job.get('f')
+    if f is None:
+        f = library.STANDARD_F
+    elif isinstance(f, dict):
+        f = np.arange(f['start'], f['stop'], f.get('step', 1))
+    f = np.asarray(f, dtype=float)
+    if f.ndim != 1 or not len(f) or not np.all(f > 0):
+        raise ValueError("The frequencies have to be a non-empty list of positive values")
+
+    output = job.get('output', 'bands')
+    if output not in OUTPUTS:
+        raise ValueError(f"Invalid Output: {output}")
+    block_size = int(job.get('block_size', DEFAULT_BLOCK_SIZE))
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    return {
+        'materials': job['materials'],
+        'sweep': sweep,
+        'f': f.tolist(),
+        'temperature': float(job.get('temperature', library.STANDARD_TEMPERATURE)),
+        'air_pressure': float(job.get('air_pressure', library.STANDARD_PRESSURE)),
+        'humidity': None if job.get('humidity') is None else float(job['humidity']),
+        'theta': float(job.get('theta', 0)),
+        'output': output,
+        'block_size': block_size,
+    }
+
+
+def job_hash(job):
+    """Hash of a parsed job, the blocks of different jobs never mix."""
+    return hashlib.sha256(json.dumps(job, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def n_configurations(job):
+    """Number of configurations of a parsed job."""
+    return int(np.prod([len(entry['values']) for entry in job['sweep']]))
+
+
+def configurations(job, start, stop):
+    """Parameter values of the configurations start to stop.
+
+    Args:
+        job (dict): Parsed job
+        start (int): First configuration
+        stop (int): End of the configurations
+
+    Returns:
+        np.ndarray: Values with shape (stop - start, number of swept parameters)
+    """
+    shape = [len(entry['values']) for entry in job['sweep']]
+    indices = np.unravel_index(np.arange(start, stop), shape)
+    return np.stack([np.asarray(entry['values'])[index] for entry, index in zip(job['sweep'], indices)], axis=-1)
+
+
+def blocks(job):
+    """(start, stop) of every block of configurations."""
+    total, size = n_configurations(job), job['block_size']
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def shard_blocks(job, shard, n_shards):
+    """Blocks of shard number shard (0 based) of n_shards, contiguous parts of blocks(job) of nearly equal size."""
+    if not 0 <= shard < n_shards:
+        raise ValueError(f"Invalid Shard: {shard + 1}/{n_shards}")
+    job_blocks = blocks(job)
+    return [job_blocks[i] for i in np.array_split(np.arange(len(job_blocks)), n_shards)[shard]]
+
+
+def block_path(directory, job, start, stop):
+    """File of a block in the result directory of a job."""
+    return os.path.join(directory, job_hash(job)[:16], f"block-{start:010d}-{stop:010d}.npz")
+
+
+def solve_block(job, start, stop, max_elements=DEFAULT_MAX_ELEMENTS):
+    """Calculates the configurations start to stop in population batches.
+
+    Args:
+        job (dict): Parsed job
+        start (int): First configuration
+        stop (int): End of the configurations
+        max_elements (int, optional): Maximum number of configurations times frequencies evaluated at once
+
+    Returns:
+        dict: Arrays of the block, see the module documentation
+    """
+    f = np.asarray(job['f'])
+    values = configurations(job, start, stop)
+    samples = {(entry['layer'], entry['parameter']): values[:, i] for i, entry in enumerate(job['sweep'])}
+    air_density, air_speed, viscosity = air_properties(job['temperature'], job['air_pressure'], job['humidity'])
+
+    n = stop - start
+    alpha = np.empty((n, len(f))) if job['output'] == 'alpha' else None
+    accumulators = {plot_type: BandAccumulator(plot_type) for plot_type in ('oct', 'third')}
+    rating_accumulator = BandAccumulator('third', standard=True)
+    f_step = max(1, max_elements // n)
+    for f_start in range(0, len(f), f_step):
+        f_chunk = f[f_start:f_start + f_step]
+        alpha_chunk = solve_samples(job['materials'], samples, 0, n, f_chunk, air_density, air_speed, viscosity,
+                                    job['air_pressure'], job['theta'])
+        if alpha is not None:
+            alpha[:, f_start:f_start + f_step] = alpha_chunk
+        for accumulator in (*accumulators.values(), rating_accumulator):
+            accumulator.update(f_chunk, alpha_chunk)
+
+    result = {'values': values}
+    if alpha is not None:
+        result['alpha'] = alpha
+    for plot_type, accumulator in accumulators.items():
+        result[f'{plot_type}_mean'] = accumulator.means()
+        result[f'{plot_type}_min'] = accumulator.minima()
+        result[f'{plot_type}_max'] = accumulator.maxima()
+    result.update(ratings.ratings(rating_accumulator.means()))
+    return result
+
+
+def _save(path, arrays):
+    """Writes an NPZ file atomically, an interrupted write never leaves a partial block."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _is_complete(path):
+    try:
+        with np.load(path) as data:
+            return 'values' in data.files
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return False
+
+
+def run_shard(job, directory, shard=0, n_shards=1, progress=None):
+    """Calculates the blocks of one shard that are not saved yet.
+
+    Args:
+        job (dict): Parsed job
+        directory (str): Result directory of the job
+        shard (int, optional): Number of the shard, 0 based
+        n_shards (int, optional): Number of shards
+        progress (callable, optional): Called with the number of finished and total blocks of the shard
+
+    Returns:
+        int: Number of blocks calculated, 0 if the shard was already complete
+    """
+    shard_job_blocks = shard_blocks(job, shard, n_shards)
+    calculated = 0
+    for i, (start, stop) in enumerate(shard_job_blocks):
+        path = block_path(directory, job, start, stop)
+        if not _is_complete(path):
+            _save(path, solve_block(job, start, stop))
+            calculated += 1
+        if progress is not None:
+            progress(i + 1, len(shard_job_blocks))
+    return calculated
+
+
+def missing_blocks(job, directory):
+    """Blocks of a job that are not saved yet."""
+    return [(start, stop) for start, stop in blocks(job)
+            if not _is_complete(block_path(directory, job, start, stop))]
+
+
+def merge(job, directory, path=None):
+    """Merges the blocks of a finished job into one NPZ file.
+
+    Args:
+        job (dict): Parsed job
+        directory (str): Result directory of the job
+        path (str, optional): Output file, defaults to result.npz next to the blocks of the job, so jobs sharing a
+            directory do not overwrite each other's result
+
+    Returns:
+        str: Path of the merged file, with the arrays of the blocks concatenated in the order of the configurations
+            plus the frequencies 'f' and the swept 'parameters' as 'layer.parameter'
+    """
+    missing = missing_blocks(job, directory)
+    if missing:
+        raise ValueError(f"Incomplete Job: {len(missing)} of {len(blocks(job))} blocks are missing")
+    parts = {}
+    for start, stop in blocks(job):
+        with np.load(block_path(directory, job, start, stop)) as data:
+            for name in data.files:
+                parts.setdefault(name, []).append(data[name])
+    merged = {name: np.concatenate(arrays) for name, arrays in parts.items()}
+    merged['f'] = np.asarray(job['f'])
+    merged['parameters'] = np.array([f"{entry['layer']}.{entry['parameter']}" for entry in job['sweep']])
+    path = path or os.path.join(directory, job_hash(job)[:16], 'result.npz')
+    _save(path, merged)
+    return path
+
+
+def parse_shard(text):
+    """Parses a shard like '2/4' (1 based) into the 0 based shard number and the number of shards."""
+    try:
+        shard, n_shards = (int(value) for value in text.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid Shard: {text}") from None
+    if not 1 <= shard <= n_shards:
+        raise ValueError(f"Invalid Shard: {text}")
+    return shard - 1, n_shards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable, shardable parameter sweeps of the absorption "
+                                                 "coefficient")
+    parser.add_argument('command', choices=('run', 'status', 'merge'))
+    parser.add_argument('job', help="JSON job file")
+    parser.add_argument('--directory', help="result directory, defaults to the job file name with '.results'")
+    parser.add_argument('--shard', default='1/1', help="shard to run as i/n, 1 <= i <= n")
+    parser.add_argument('--output', help="merged file, defaults to result.npz next to the blocks of the job")
+    args = parser.parse_args()
+
+    try:
+        job = load_job(args.job)
+        directory = args.directory or os.path.splitext(args.job)[0] + '.results'
+        if args.command == 'run':
+            shard, n_shards = parse_shard(args.shard)
+            calculated = run_shard(job, directory, shard, n_shards,
+                                   progress=lambda done, total: print(f"\rBlock {done}/{total}", end='', flush=True))
+            print(f"\nShard {args.shard}: {calculated} blocks calculated")
+        elif args.command == 'status':
+            n_missing = len(missing_blocks(job, directory))
+            n_blocks = len(blocks(job))
+            print(f"{n_blocks - n_missing}/{n_blocks} blocks of {n_configurations(job)} configurations finished")
+        else:
+            print(f"Merged into {merge(job, directory, args.output)}")
+    except (ValueError, KeyError) as e:
+        parser.error(str(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import cmath
+import importlib.util
+import math
+import threading
+import types
+
+import numpy as np
+
+from . import models
+
+# Numba is only detected here and imported when the first kernel is compiled, as importing it is slow
+HAVE_NUMBA = importlib.util.find_spec('numba') is not None
+prange = range
+_compiled = False
+_compile_lock = threading.Lock()
+
+BACKENDS = ('numpy', 'numba')
+
+AIR, POROUS_JAC, PERFORATED_PLATE, PLATE, POROUS_DB, POROUS_MIKI = range(6)
+_CODES = {'Air': AIR, 'Porous': POROUS_JAC, 'Microperforated Plate': PERFORATED_PLATE, 'Plate': PLATE}
+_POROUS_CODES = {'JAC': POROUS_JAC, 'DB': POROUS_DB, 'Miki': POROUS_MIKI}
+# Coefficients and exponents of the wave number and the impedance of the empirical models
+_DB = (0.0978, 0.7, 0.189, 0.595, 0.0571, 0.754, 0.087, 0.732)
+_MIKI = (0.109, 0.618, 0.160, 0.618, 0.070, 0.632, 0.107, 0.632)
+
+# NumPy is the default, importing Numba and loading the cached kernels takes about half a second per process, far more
+# than a NumPy solve of the standard frequencies
+_backend = 'numpy'
+
+
+def get_backend():
+    """Returns the name of the backend used by absorptioncoeff.solve by default."""
+    return _backend
+
+
+def set_backend(name):
+    """Selects the backend used by absorptioncoeff.solve by default.
+
+    Args:
+        name (str): 'numpy' for the vectorized models, 'numba' for the compiled kernels
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Invalid Backend: {name}")
+    if name == 'numba' and not HAVE_NUMBA:
+        raise ImportError("The numba backend requires the numba package")
+    _backend = name
+
+
+def encode_stack(materials, f, air_density, air_speed, viscosity):
+    """Packs a stack of materials into the arrays the compiled kernel works on.
+
+    The Bessel functions of Maa's model are not available in compiled code, so the impedance of microperforated plates
+    is evaluated with NumPy beforehand and passed to the kernel per frequency.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+
+    Returns:
+        tuple: Layer codes, layer parameters and precomputed plate impedances
+    """
+    codes = np.empty(len(materials), dtype=np.int64)
+    params = np.zeros((len(materials), 5))
+    series_Z = []
+    for l, material in enumerate(materials):
+        if material[0] not in _CODES:
+            raise ValueError(f"Invalid Model: {material[0]}")
+        codes[l] = _CODES[material[0]]
+        params[l, 0] = material[1] / 1000
+        if codes[l] == POROUS_JAC:
+            porous_model = material[5] if len(material) > 5 else 'JAC'
+            if porous_model not in _POROUS_CODES:
+                raise ValueError(f"Invalid Porous Model: {porous_model}")
+            codes[l] = _POROUS_CODES[porous_model]
+            params[l, 1:4] = material[2:5]
+        elif codes[l] == PERFORATED_PLATE:
+            params[l, 1] = len(series_Z)
+            series_Z.append(models.PerforatedPlate_Absorber(f, air_density, air_speed, params[l, 0], viscosity,
+                                                            *material[2:4]).get_Z())
+        else:
+            params[l, 1:len(material) - 1] = material[2:]
+    series_Z = np.array(series_Z, dtype=np.complex128).reshape(len(series_Z), len(f))
+    return codes, params, series_Z
+
+
+def abs_coeff(materials, f, air_density, air_speed, viscosity, air_pressure, theta):
+    """Calculates the absorption coefficient of a stack with the compiled kernel.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+
+    Returns:
+        alpha (np.ndarray): Absorption coefficient for each frequency
+    """
+    if not HAVE_NUMBA:
+        raise ImportError("The numba backend requires the numba package")
+    _compile()
+    f = np.ascontiguousarray(f, dtype=np.float64)
+    codes, params, series_Z = encode_stack(materials, f, air_density, air_speed, viscosity)
+    alpha = np.empty(len(f))
+    # Numba's parallel runtime must only be launched from the main thread, e.g. Streamlit runs the pages in a
+    # separate thread, so the serial kernel is used there
+    main_thread = threading.current_thread() is threading.main_thread()
+    kernel = _chain_abs_coeff_parallel if main_thread else _chain_abs_coeff
+    kernel(f, codes, params, series_Z, float(air_density), float(air_speed), float(viscosity), float(air_pressure),
+           float(theta), alpha)
+    return alpha
+
+
+def _propagation(k, Z, kx, L1):
+    """Transfer matrix elements of a fluid layer, see models.Air_Absorber.get_T."""
+    k_z = cmath.sqrt(k ** 2 - kx ** 2)
+    cos = cmath.cos(k_z * L1)
+    sin = cmath.sin(k_z * L1)
+    return cos, 1j * Z * (k / k_z) * sin, (1j / Z) * (k_z / k) * sin, cos
+
+
+def _jac(omega, air_density, viscosity, air_pressure, sigma, phi, alpha_inf):
+    """Wave number and impedance of the JAC model, see models.Porous_Absorber_JAC."""
+    gamma = 1.4
+    kappa = 0.0241
+    cp = 1.01
+    K0 = gamma * air_pressure
+    delta_v = math.sqrt(2 * viscosity / (air_density * omega))
+    delta_h = math.sqrt(2 * kappa / (air_density * omega * cp))
+    Pr = (delta_v / delta_h) ** 2
+    viscosity_L = math.sqrt(8 * viscosity * alpha_inf / (phi * sigma))
+    thermal_L = 2 * viscosity_L
+
+    G1 = sigma * phi / (alpha_inf * air_density * omega)
+    G2 = 4 * alpha_inf ** 2 * air_density * viscosity * omega / ((sigma * phi * viscosity_L) ** 2)
+    G1_dot = 8 * viscosity / (air_density * Pr * thermal_L ** 2 * omega)
+    G2_dot = air_density * Pr * thermal_L ** 2 * omega / (16 * viscosity)
+    density_p = air_density * alpha_inf * (1 - 1j * G1 * cmath.sqrt(1 + 1j * G2)) / phi
+    Kp = K0 / phi / (gamma - (gamma - 1) / (1 - 1j * G1_dot * cmath.sqrt(1 + 1j * G2_dot)))
+    return omega * cmath.sqrt(density_p / Kp), cmath.sqrt(density_p * Kp)
+
+
+def _empirical(omega, X, air_density, air_speed, coefficients):
+    """Wave number and impedance of the empirical porous models, see models.Porous_Absorber_DB."""
+    a, b, c, d, e, g, h, i = coefficients
+    k = omega / air_speed * (1 + a * X ** (-b) - 1j * c * X ** (-d))
+    Z = air_density * air_speed * (1 + e * X ** (-g) - 1j * h * X ** (-i))
+    return k, Z
+
+
+def _plate(f, omega, air_speed, theta, L1, density, E, nu, eta):
+    """Impedance of the plate model, see models.Plate_Absorber."""
+    m_dot = density * L1
+    D = E * L1 ** 3 / (12 * (1 - nu ** 2))
+    fc = air_speed ** 2 / (2 * math.pi) * math.sqrt(m_dot / D)
+    return 1j * m_dot * omega * (1 - (f / fc) ** 2 * (1 + 1j * eta) * math.sin(theta) ** 4)
+
+
+def _chain_abs_coeff(f, codes, params, series_Z, air_density, air_speed, viscosity, air_pressure, theta, alpha):
+    """Evaluates all layers and the chain product in one pass per frequency, without temporary arrays."""
+    Z0 = air_speed * air_density
+    for n in prange(len(f)):
+        omega = 2 * math.pi * f[n]
+        kx = omega / air_speed * math.sin(theta)
+        a, b, c, d = 1 + 0j, 0j, 0j, 1 + 0j
+        for l in range(len(codes)):
+            L1 = params[l, 0]
+            if codes[l] == AIR:
+                t11, t12, t21, t22 = _propagation(omega / air_speed + 0j, air_density * air_speed + 0j, kx, L1)
+            elif codes[l] == POROUS_JAC:
+                k, Z = _jac(omega, air_density, viscosity, air_pressure, params[l, 1], params[l, 2], params[l, 3])
+                t11, t12, t21, t22 = _propagation(k, Z, kx, L1)
+            elif codes[l] == POROUS_DB:
+                k, Z = _empirical(omega, air_density * f[n] / params[l, 1], air_density, air_speed, _DB)
+                t11, t12, t21, t22 = _propagation(k, Z, kx, L1)
+            elif codes[l] == POROUS_MIKI:
+                k, Z = _empirical(omega, f[n] / params[l, 1], air_density, air_speed, _MIKI)
+                t11, t12, t21, t22 = _propagation(k, Z, kx, L1)
+            elif codes[l] == PERFORATED_PLATE:
+                t11, t12, t21, t22 = 1 + 0j, series_Z[int(params[l, 1]), n], 0j, 1 + 0j
+            else:
+                Z = _plate(f[n], omega, air_speed, theta, L1, params[l, 1], params[l, 2], params[l, 3], params[l, 4])
+                t11, t12, t21, t22 = 1 + 0j, Z, 0j, 1 + 0j
+            a, b, c, d = a * t11 + b * t21, a * t12 + b * t22, c * t11 + d * t21, c * t12 + d * t22
+
+        R = (a * math.cos(theta) - Z0 * c) / (a * math.cos(theta) + Z0 * c)
+        alpha[n] = 1 - abs(R) ** 2
+
+
+def _renamed(function, name):
+    """Copy of a function under another name. Numba names its cache files after the qualified name, so two builds of
+    one function only get separate caches as separate functions."""
+    copy = types.FunctionType(function.__code__, function.__globals__, name, function.__defaults__,
+                              function.__closure__)
+    copy.__qualname__ = name
+    return copy
+
+
+def _compile():
+    """Replaces the kernel functions by their compiled versions on first use."""
+    global _compiled, prange, _propagation, _jac, _empirical, _plate, _chain_abs_coeff, _chain_abs_coeff_parallel
+    with _compile_lock:
+        if _compiled:
+            return
+        import numba
+        prange = numba.prange
+        _propagation = numba.njit(cache=True)(_propagation)
+        _jac = numba.njit(cache=True)(_jac)
+        _empirical = numba.njit(cache=True)(_empirical)
+        _plate = numba.njit(cache=True)(_plate)
+        # the parallel build is a separate function, as the on-disk cache index does not tell the builds apart
+        _chain_abs_coeff_parallel = numba.njit(cache=True, parallel=True)(
+            _renamed(_chain_abs_coeff, '_chain_abs_coeff_parallel'))
+        _chain_abs_coeff = numba.njit(cache=True)(_chain_abs_coeff)
+        _compiled = True
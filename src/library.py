@@ -0,0 +1,161 @@
+import json
+import os
+
+import numpy as np
+
+from . import absorptioncoeff, models
+from .absorptioncoeff import AbsorptionCoeff
+from .air import air_properties
+from .cache import default_cache
+
+CATALOGUE_PATH = os.path.join(os.path.dirname(__file__), 'catalogue.json')
+
+# Standard conditions of the precomputed transfer matrices, the defaults of the calculator pages
+STANDARD_F = np.arange(1, 20000, 1)
+STANDARD_TEMPERATURE = 20
+STANDARD_PRESSURE = 101325
+
+_default_library = None
+
+
+def standard_air():
+    """Density, speed of sound and viscosity of air at the standard conditions, as calculated by the pages."""
+    return air_properties(STANDARD_TEMPERATURE, STANDARD_PRESSURE)
+
+
+def load_catalogue(path=CATALOGUE_PATH):
+    """Loads a material catalogue.
+
+    Args:
+        path (str, optional): JSON file with the layer of each material by name, see models.transfer_matrix for the
+            format of a layer
+
+    Returns:
+        dict: Layer by material name
+    """
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+class MaterialLibrary:
+    """Catalogue of materials with precomputed transfer matrices.
+
+    The transfer matrix of every catalogue material is calculated once on STANDARD_F at normal incidence and standard
+    air conditions, and stored in a disk cache shared by all processes. Layers of a stack that equal a catalogue
+    material use the precomputed matrices when the conditions match, so only the chain product is calculated for
+    them.
+
+    Args:
+        catalogue (dict, optional): Layer by material name, defaults to the catalogue shipped with the calculator
+        cache (cache.DiskCache, optional): Cache of the precomputed matrices, defaults to cache.default_cache()
+    """
+
+    def __init__(self, catalogue=None, cache=None):
+        self.catalogue = load_catalogue() if catalogue is None else catalogue
+        self.cache = cache or default_cache()
+        self.air = standard_air()
+        self._matrices = {}
+        self._layers = {tuple(layer): name for name, layer in self.catalogue.items()}
+
+    def names(self):
+        """Names of the catalogue materials."""
+        return list(self.catalogue)
+
+    def layer(self, name):
+        """Returns a copy of the layer of a catalogue material."""
+        if name not in self.catalogue:
+            raise ValueError(f"Invalid Material: {name}")
+        return list(self.catalogue[name])
+
+    def stack(self, names):
+        """Returns the stack of the given catalogue materials."""
+        return [self.layer(name) for name in names]
+
+    def matrix(self, name):
+        """Precomputed transfer matrices of a catalogue material on STANDARD_F, with shape (N, 2, 2)."""
+        if name not in self._matrices:
+            layer = self.layer(name)
+            # own key namespace, the results of cache.cached_solve use the plain stack hash
+            key = 'transfer-matrix-' + absorptioncoeff.stack_hash([layer], STANDARD_F, *self.air, STANDARD_PRESSURE, 0)
+            cached = self.cache.get(key)
+            if cached is None or 'T' not in cached:
+                T = models.transfer_matrix(layer, STANDARD_F, *self.air, STANDARD_PRESSURE, 0)
+                self.cache.put(key, T=T)
+            else:
+                T = cached['T']
+            self._matrices[name] = T
+        return self._matrices[name]
+
+    def precompute(self):
+        """Calculates the transfer matrices of all catalogue materials, e.g. when deploying the calculator."""
+        for name in self.catalogue:
+            self.matrix(name)
+
+    def transfer_matrices(self, materials, f, air_density, air_speed, viscosity, air_pressure, theta):
+        """Yields the transfer matrices of the layers of a stack, precomputed ones where possible.
+
+        Args:
+            materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+            f (np.ndarray): Frequencies
+            air_density (float): Density of air
+            air_speed (float): Speed of air
+            viscosity (float): Viscosity of air
+            air_pressure (float): Air pressure
+            theta (float): Angle of incidence in radians
+
+        Yields:
+            np.ndarray: Transfer matrices of each layer with shape (N, 2, 2)
+        """
+        indices = self._standard_indices(f, (air_density, air_speed, viscosity), air_pressure, theta)
+        for material in materials:
+            name = self._layers.get(tuple(material)) if indices is not None else None
+            if name is None:
+                yield models.transfer_matrix(material, f, air_density, air_speed, viscosity, air_pressure, theta)
+            else:
+                yield self.matrix(name)[indices]
+
+    def solve(self, materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision='double'):
+        """Calculates the absorption coefficient like absorptioncoeff.solve, using the precomputed matrices.
+
+        Stacks without catalogue materials or at other conditions are calculated by absorptioncoeff.solve.
+
+        Args:
+            materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+            f (np.ndarray): Frequencies
+            air_density (float): Density of air
+            air_speed (float): Speed of air
+            viscosity (float): Viscosity of air
+            air_pressure (float): Air pressure
+            theta (float): Angle of incidence in radians
+            precision (str, optional): Working precision, 'double' or 'single'
+
+        Returns:
+            alpha (np.ndarray): Absorption coefficient for each frequency
+        """
+        standard = self._standard_indices(f, (air_density, air_speed, viscosity), air_pressure, theta) is not None
+        if precision != 'double' or not standard or not any(tuple(material) in self._layers
+                                                            for material in materials):
+            return absorptioncoeff.solve(materials, f, air_density, air_speed, viscosity, air_pressure, theta,
+                                         precision)
+        T = self.transfer_matrices(materials, f, air_density, air_speed, viscosity, air_pressure, theta)
+        return AbsorptionCoeff(T, air_speed * air_density, theta).abs_coeff()
+
+    def _standard_indices(self, f, air, air_pressure, theta):
+        """Indices of f in STANDARD_F, None if the frequencies or conditions are not the standard ones."""
+        if any(np.ndim(value) for value in (*air, air_pressure, theta)):
+            return None
+        if theta != 0 or air_pressure != STANDARD_PRESSURE or not np.allclose(air, self.air, rtol=1e-12, atol=0):
+            return None
+        f = np.asarray(f)
+        indices = np.clip(np.searchsorted(STANDARD_F, f), 0, len(STANDARD_F) - 1)
+        if f.ndim != 1 or not np.array_equal(STANDARD_F[indices], f):
+            return None
+        return indices
+
+
+def default_library():
+    """Library of the catalogue shipped with the calculator."""
+    global _default_library
+    if _default_library is None:
+        _default_library = MaterialLibrary()
+    return _default_library
@@ -0,0 +1,121 @@
+import io
+import os
+import re
+
+import numpy as np
+
+from . import absorptioncoeff
+from .bands import BandAccumulator
+
+
+def read_measurement(file):
+    """Reads a measured absorption coefficient from a CSV file with arbitrary frequency sampling.
+
+    The first column is the frequency in Hz and the second the absorption coefficient, further columns are ignored.
+    Comma, semicolon, tab and whitespace separated files are accepted, with a decimal comma if the separator is not a
+    comma. A comma is only taken as separator if no whitespace separates the fields, e.g. '100 0,1' is whitespace
+    separated with a decimal comma. Header lines before the data and lines starting with '#' are skipped.
+
+    Args:
+        file (str | bytes | file-like): Path, content or open file, e.g. a Streamlit upload
+
+    Returns:
+        tuple: Frequencies and absorption coefficient, sorted by frequency
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, encoding='utf-8-sig') as handle:
+            text = handle.read()
+    else:
+        data = file if isinstance(file, bytes) else file.read()
+        text = data.decode('utf-8-sig') if isinstance(data, bytes) else data
+
+    lines = [line.strip() for line in io.StringIO(text)]
+    lines = [line for line in lines if line and not line.startswith('#')]
+    # the delimiter is detected on the data lines, the header may contain any separator
+    sample = [line for line in lines if re.match(r'[+-]?\.?\d', line)][:20]
+    delimiter = next((candidate for candidate in (';', '\t') if any(candidate in line for line in sample)), None)
+    if delimiter is None and any(',' in line for line in sample) and not any(
+            re.search(r'[^\s,]\s+[^\s,]', line) for line in sample):
+        delimiter = ','
+
+    rows = []
+    for number, line in enumerate(lines, 1):
+        fields = line.split(delimiter)
+        if delimiter != ',':
+            fields = [field.replace(',', '.') for field in fields]
+        try:
+            rows.append((float(fields[0]), float(fields[1])))
+        except (ValueError, IndexError):
+            if rows:
+                raise ValueError(f"Invalid Measurement: line {number} is not a frequency and a value") from None
+
+    if not rows:
+        raise ValueError("Invalid Measurement: no data rows")
+    f, alpha = np.array(rows).T
+    if not np.all(np.isfinite(f) & (f > 0)) or not np.all(np.isfinite(alpha)):
+        raise ValueError("Invalid Measurement: the frequencies have to be positive and all values finite")
+    order = np.argsort(f, kind='stable')
+    return f[order], alpha[order]
+
+
+def residuals(f, alpha_measured, alpha_model, plot_type='third'):
+    """Deviation of the model from a measurement, in total and per band.
+
+    Args:
+        f (np.ndarray): Measured frequencies
+        alpha_measured (np.ndarray): Measured absorption coefficient
+        alpha_model (np.ndarray): Model at the measured frequencies, may have leading axes for several
+            configurations
+        plot_type (str, optional): Type of bands. Options are 'oct' and 'third'.
+
+    Returns:
+        dict: The residual model - measurement, its mean (bias), RMS and maximum absolute value, and per band the
+            center frequencies, number of measured points, band means of measurement and model, bias, RMS and
+            maximum absolute residual. Bands without measured points are NaN.
+    """
+    alpha_measured, alpha_model = np.broadcast_arrays(np.asarray(alpha_measured, dtype=float),
+                                                      np.asarray(alpha_model, dtype=float))
+    residual = alpha_model - alpha_measured
+    accumulator = BandAccumulator(plot_type)
+    accumulator.update(f, np.stack([alpha_measured, alpha_model, residual, residual ** 2, np.abs(residual)]))
+    empty = accumulator.counts == 0
+    means = np.where(empty, np.nan, accumulator.means())
+    return {
+        'residual': residual,
+        'bias': residual.mean(axis=-1),
+        'rms': np.sqrt((residual ** 2).mean(axis=-1)),
+        'max': np.abs(residual).max(axis=-1),
+        'center_freqs': accumulator.center_freqs,
+        'counts': accumulator.counts,
+        'band_measured': means[0],
+        'band_model': means[1],
+        'band_bias': means[2],
+        'band_rms': np.sqrt(means[3]),
+        'band_max': np.where(empty, np.nan, accumulator.maxima()[4]),
+    }
+
+
+def compare_measurement(materials, f, alpha_measured, air_density, air_speed, viscosity, air_pressure, theta,
+                        plot_type='third', solver=None):
+    """Evaluates a stack at the measured frequencies only and compares it with the measurement.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Measured frequencies
+        alpha_measured (np.ndarray): Measured absorption coefficient
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        plot_type (str, optional): Type of bands. Options are 'oct' and 'third'.
+        solver (callable, optional): Function with the arguments of absorptioncoeff.solve, e.g.
+            cache.cached_solve, defaults to absorptioncoeff.solve
+
+    Returns:
+        dict: The model at the measured frequencies as 'model' and the metrics of residuals
+    """
+    solver = solver or absorptioncoeff.solve
+    alpha_model = solver(materials, np.asarray(f, dtype=float), air_density, air_speed, viscosity, air_pressure,
+                         theta)
+    return {'model': alpha_model, **residuals(f, alpha_measured, alpha_model, plot_type)}
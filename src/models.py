@@ -1,5 +1,59 @@
 import numpy as np
-from scipy.special import jv
+
+
+PRECISIONS = {'double': np.complex128, 'single': np.complex64}
+
+
+def _matrix(T11, T12, T21, T22, dtype=np.complex128):
+    """Assembles a transfer matrix from its four elements.
+
+    The elements may be scalars or arrays of any broadcastable shape, so that a whole frequency range is evaluated
+    in one call. The matrix axes are always the last two axes of the result.
+
+    Returns:
+        T (np.ndarray): Transfer matrix of shape (..., 2, 2) and the given dtype
+    """
+    T = np.empty(np.broadcast_shapes(*(np.shape(T_ij) for T_ij in (T11, T12, T21, T22))) + (2, 2), dtype=dtype)
+    T[..., 0, 0], T[..., 0, 1], T[..., 1, 0], T[..., 1, 1] = T11, T12, T21, T22
+    return T
+
+
+def _sqrt(z):
+    """Principal square root. NumPy evaluates the complex64 functions without SIMD, several times slower than the
+    complex128 ones, so for complex64 it is written with the vectorized real float32 functions."""
+    if np.result_type(z) != np.complex64:
+        return np.sqrt(z)
+    a, b = np.real(z), np.imag(z)
+    t = np.sqrt((np.abs(z) + np.abs(a)) / 2)
+    u = np.divide(np.abs(b), 2 * t, out=np.zeros_like(t), where=t > 0)
+    root = np.empty_like(z)
+    root.real = np.where(a >= 0, t, u)
+    root.imag = np.copysign(np.where(a >= 0, u, t), b)
+    return root
+
+
+def _cos_sin(z):
+    """Cosine and sine, for complex64 written with the real float32 functions like _sqrt."""
+    if np.result_type(z) != np.complex64:
+        return np.cos(z), np.sin(z)
+    x, y = np.real(z), np.imag(z)
+    cos_x, sin_x, cosh_y, sinh_y = np.cos(x), np.sin(x), np.cosh(y), np.sinh(y)
+    cos, sin = np.empty_like(z), np.empty_like(z)
+    cos.real, cos.imag = cos_x * cosh_y, -sin_x * sinh_y
+    sin.real, sin.imag = sin_x * cosh_y, cos_x * sinh_y
+    return cos, sin
+
+
+def _propagation_matrix(k, Z, k_z, L1, dtype=np.complex128):
+    """Transfer matrix of a fluid layer with wave number k, impedance Z and wave number k_z across the layer."""
+    cos, sin = _cos_sin(k_z * L1)
+    return _matrix(cos, 1j * Z * (k / k_z) * sin, (1j / Z) * (k_z / k) * sin, cos, dtype)
+
+
+def _bessel_ratio(s):
+    """Ratio of the Bessel functions in Maa's model, 2 J_1(x) / (x J_0(x)) with x = s sqrt(-1j)."""
+    from scipy.special import jv  # imported on first use, SciPy is only needed for this model
+    return 2 * jv(1, s * np.sqrt(-1j)) / (s * np.sqrt(-1j)) / jv(0, s * np.sqrt(-1j))
 
 
 class AbsorberModelInterface:
@@ -12,17 +66,38 @@ class AbsorberModelInterface:
         L (float): Thickness of the layer
         viscosity (float): Viscosity of air
         omega (float): Angular frequency
+        precision (str, optional): 'double' computes everything in float64 and complex128, 'single' computes the
+            whole model in float32 and complex64. Only the numerically sensitive square roots of the JAC model and
+            the Bessel ratio of Maa's model are evaluated in double precision and then rounded.
     """
 
     f = air_density = omega = 0.0
 
-    def __init__(self, f, air_density, air_speed, L1, viscosity):
-        self.f = f
-        self.air_density = air_density
-        self.air_speed = air_speed
-        self.L1 = L1
+    def __init__(self, f, air_density, air_speed, L1, viscosity, precision='double'):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Invalid Precision: {precision}")
+        self.dtype = PRECISIONS[precision]
+        self.f = self._real(f)
+        self.air_density = self._real(air_density)
+        self.air_speed = self._real(air_speed)
+        self.L1 = self._real(L1)
         self.omega = 2 * np.pi * self.f
-        self.viscosity = viscosity
+        self.viscosity = self._real(viscosity)
+
+    def _real(self, value):
+        """Casts a real input to float32 in single precision, in double precision it is kept as it is."""
+        if self.dtype == np.complex128:
+            return value
+        return np.asarray(value, dtype=np.float32)
+
+    def _cast(self, *values):
+        """Casts values to the working precision of the model."""
+        return [np.asarray(value).astype(self.dtype, copy=False) for value in values]
+
+    def _double(self, function, value):
+        """Evaluates a numerically sensitive function of a real value in double precision, in the working precision
+        of the model."""
+        return np.asarray(function(np.asarray(value, dtype=np.float64))).astype(self.dtype, copy=False)
 
     def get_k(self):
         """Calculates the wave number. Different for each model, see source code for details.
@@ -68,11 +143,11 @@ class Porous_Absorber_DB(AbsorberModelInterface):
         T (float): Transfer Matrix of the absorber when calling get_T()
     """
 
-    def __init__(self, f, air_density, air_speed, L1, viscosity, sigma, kx):
-        super().__init__(f, air_density, air_speed, L1, viscosity)
+    def __init__(self, f, air_density, air_speed, L1, viscosity, sigma, kx, precision='double'):
+        super().__init__(f, air_density, air_speed, L1, viscosity, precision)
 
-        self.sigma = sigma
-        self.kx = kx
+        self.sigma = self._real(sigma)
+        self.kx = self._real(kx)
         self.X = (self.air_density * self.f) / self.sigma
 
     def get_k(self):
@@ -86,11 +161,42 @@ class Porous_Absorber_DB(AbsorberModelInterface):
     def get_T(self):
         k = self.get_k()
         Z = self.get_Z()
-        k_z = np.sqrt(k ** 2 - self.kx ** 2)
+        k_z = _sqrt(k ** 2 - self.kx ** 2)
+        k, Z, k_z = self._cast(k, Z, k_z)
+        return _propagation_matrix(k, Z, k_z, self.L1, self.dtype)
+
+
+class Porous_Absorber_Miki(Porous_Absorber_DB):
+    """Miki Empirical Model for a porous absorber material, a refit of the Delany & Bazley model.
+
+    Args:
+        f (float): Frequency
+        air_density (float): Density of air
+        air speed (float): Speed of air
+        sigma (float): Flow resistivity of material
+        L (float): Thickness of the layer
+        viscosity (float): Viscosity of air
+        kx (float): Wave number in x direction
 
-        T = np.array([[np.cos(k_z * self.L1), 1j * Z * (k / k_z) * np.sin(k_z * self.L1)],
-                      [(1j / Z) * (k_z / k) * np.sin(k_z * self.L1), np.cos(k_z * self.L1)]])
-        return T
+
+    Returns:
+        k (float): Wave number when calling get_k()
+        Z (float): Surface impedance when calling get_Z()
+        T (float): Transfer Matrix of the absorber when calling get_T()
+    """
+
+    def __init__(self, f, air_density, air_speed, L1, viscosity, sigma, kx, precision='double'):
+        super().__init__(f, air_density, air_speed, L1, viscosity, sigma, kx, precision)
+
+        self.X = self.f / self.sigma
+
+    def get_k(self):
+        k = self.omega / self.air_speed * (1 + 0.109 * self.X ** (-0.618) - 1j * 0.160 * self.X ** (-0.618))
+        return k
+
+    def get_Z(self):
+        Z = self.air_density * self.air_speed * (1 + 0.070 * self.X ** (-0.632) - 1j * 0.107 * self.X ** (-0.632))
+        return Z
 
 
 class Porous_Absorber_JAC(AbsorberModelInterface):
@@ -124,14 +230,14 @@ class Porous_Absorber_JAC(AbsorberModelInterface):
         T (float): Transfer Matrix of the absorber
     """
 
-    def __init__(self, f, air_density, air_speed, L1, viscosity, sigma, air_pressure, phi, alpha_inf, kx):
-        super().__init__(f, air_density, air_speed, L1, viscosity)
+    def __init__(self, f, air_density, air_speed, L1, viscosity, sigma, air_pressure, phi, alpha_inf, kx, precision='double'):
+        super().__init__(f, air_density, air_speed, L1, viscosity, precision)
 
-        self.sigma = sigma
-        self.air_pressure = air_pressure
-        self.phi = phi
-        self.alpha_inf = alpha_inf
-        self.kx = kx
+        self.sigma = self._real(sigma)
+        self.air_pressure = self._real(air_pressure)
+        self.phi = self._real(phi)
+        self.alpha_inf = self._real(alpha_inf)
+        self.kx = self._real(kx)
         self.gamma = 1.4
         self.K0 = self.gamma * self.air_pressure
         self.kappa = 0.0241
@@ -147,25 +253,26 @@ class Porous_Absorber_JAC(AbsorberModelInterface):
 
         self.G1_dot = 8 * self.viscosity / (self.air_density * self.Pr * ((self.thermal_L) ** 2) * self.omega)
         self.G2_dot = self.air_density * self.Pr * ((self.thermal_L) ** 2) * self.omega / (16 * self.viscosity)
-        self.density_p = self.air_density * self.alpha_inf * (1 - 1j * self.G1 * np.sqrt(1 + 1j * self.G2)) / self.phi
-        self.Kp = self.K0 * self.phi ** (-1) / (self.gamma - (self.gamma - 1) * ((1 - 1j * self.G1_dot * np.sqrt(1 + 1j * self.G2_dot)) ** -1))
+        root = self._double(lambda G2: np.sqrt(1 + 1j * G2), self.G2)
+        root_dot = self._double(lambda G2_dot: np.sqrt(1 + 1j * G2_dot), self.G2_dot)
+        self.density_p = self.air_density * self.alpha_inf * (1 - 1j * self.G1 * root) / self.phi
+        self.Kp = self.K0 * self.phi ** (-1) / (self.gamma - (self.gamma - 1) *
+                                                ((1 - 1j * self.G1_dot * root_dot) ** -1))
 
     def get_k(self):
-        k = self.omega * np.sqrt(self.density_p / self.Kp)
+        k = self.omega * _sqrt(self.density_p / self.Kp)
         return k
 
     def get_Z(self):
-        Z = np.sqrt(self.density_p * self.Kp)
+        Z = _sqrt(self.density_p * self.Kp)
         return Z
 
     def get_T(self):
         k = self.get_k()
         Z = self.get_Z()
-        k_z = np.sqrt(k ** 2 - self.kx ** 2)
-
-        T = np.array([[np.cos(k_z * self.L1), 1j * Z * (k / k_z) * np.sin(k_z * self.L1)],
-                      [(1j / Z) * (k_z / k) * np.sin(k_z * self.L1), np.cos(k_z * self.L1)]])
-        return T
+        k_z = _sqrt(k ** 2 - self.kx ** 2)
+        k, Z, k_z = self._cast(k, Z, k_z)
+        return _propagation_matrix(k, Z, k_z, self.L1, self.dtype)
 
 
 class PerforatedPlate_Absorber(AbsorberModelInterface):
@@ -193,11 +300,11 @@ class PerforatedPlate_Absorber(AbsorberModelInterface):
         T (float): Transfer Matrix of the absorber
     """
 
-    def __init__(self, f, air_density, air_speed, L1, viscosity, d_hole, a):
-        super().__init__(f, air_density, air_speed, L1, viscosity)
+    def __init__(self, f, air_density, air_speed, L1, viscosity, d_hole, a, precision='double'):
+        super().__init__(f, air_density, air_speed, L1, viscosity, precision)
 
-        self.d_hole = d_hole/1000
-        self.a = a/1000
+        self.d_hole = self._real(d_hole)/1000
+        self.a = self._real(a)/1000
 
     def get_k(self):
         k = self.omega / self.air_speed
@@ -210,16 +317,14 @@ class PerforatedPlate_Absorber(AbsorberModelInterface):
         self.F_e = (1 - 1.4092 * self.e + 0.33818 * (self.e ** 3) + 0.06793 *
                     (self.e ** 5) - 0.02287 * (self.e ** 6) + 0.03015 *
                     (self.e ** 7) - 0.01641 * (self.e ** 8)) ** (-1)
-        J_0 = jv(0, self.s * np.sqrt(-1j))
-        J_1 = jv(1, self.s * np.sqrt(-1j))
+        bessel_ratio = self._double(_bessel_ratio, self.s)
         Z = ((np.sqrt(2 * self.air_density * self.omega * self.viscosity) / 2 * self.phi) +
              (1j * (self.omega * self.air_density / self.phi)) * (0.85 * self.d_hole / self.F_e +
-                                                self.L1 * (1 - 2 * J_1 / (self.s * np.sqrt(-1j)) / J_0) ** (-1)))
+                                                self.L1 * (1 - bessel_ratio) ** (-1)))
         return Z
 
     def get_T(self):
-        T = np.array([[1, self.get_Z()],
-                      [0, 1]])
+        T = _matrix(1, self.get_Z(), 0, 1, self.dtype)
         return T
 
 
@@ -241,10 +346,10 @@ class Air_Absorber(AbsorberModelInterface):
         T (float): Transfer Matrix of the absorber
     """
 
-    def __init__(self, f, air_density, air_speed, L1, viscosity, kx):
-        super().__init__(f, air_density, air_speed, L1, viscosity)
+    def __init__(self, f, air_density, air_speed, L1, viscosity, kx, precision='double'):
+        super().__init__(f, air_density, air_speed, L1, viscosity, precision)
 
-        self.kx = kx
+        self.kx = self._real(kx)
 
     def get_k(self):
         k = 2 * np.pi * self.f / self.air_speed
@@ -257,10 +362,9 @@ class Air_Absorber(AbsorberModelInterface):
     def get_T(self):
         k = self.get_k()
         Z = self.get_Z()
-        k_z = np.sqrt(k ** 2 - self.kx ** 2)
-        T = np.array([[np.cos(k_z * self.L1), 1j * Z * (k / k_z) * np.sin(k_z * self.L1)],
-                      [(1j / Z) * (k_z / k) * np.sin(k_z * self.L1), np.cos(k_z * self.L1)]])
-        return T
+        k_z = _sqrt(k ** 2 - self.kx ** 2)
+        k, Z, k_z = self._cast(k, Z, k_z)
+        return _propagation_matrix(k, Z, k_z, self.L1, self.dtype)
 
 class Plate_Absorber(AbsorberModelInterface):
     """Infinite Elastic Vibrating Wall Model for a plate absorber material.
@@ -285,15 +389,15 @@ class Plate_Absorber(AbsorberModelInterface):
             T (float): Transfer Matrix of the absorber
         """
 
-    def __init__(self, f, air_density, air_speed, L1, viscosity, theta, density, E, nu, eta):
-        super().__init__(f, air_density, air_speed, L1, viscosity)
+    def __init__(self, f, air_density, air_speed, L1, viscosity, theta, density, E, nu, eta, precision='double'):
+        super().__init__(f, air_density, air_speed, L1, viscosity, precision)
 
         self.omega = 2 * np.pi * self.f
-        self.theta = theta
-        self.density = density
-        self.E = E
-        self.nu = nu
-        self.eta = eta
+        self.theta = self._real(theta)
+        self.density = self._real(density)
+        self.E = self._real(E)
+        self.nu = self._real(nu)
+        self.eta = self._real(eta)
 
         self.m_dot = self.density * self.L1
         self.D = self.E * self.L1 ** 3 / (12 * (1 - self.nu ** 2))
@@ -309,6 +413,64 @@ class Plate_Absorber(AbsorberModelInterface):
 
     def get_T(self):
         Z = self.get_Z()
-        T = np.array([[1, Z],
-                      [0, 1]])
+        T = _matrix(1, Z, 0, 1, self.dtype)
         return T
+
+
+POROUS_MODELS = {'JAC': Porous_Absorber_JAC, 'DB': Porous_Absorber_DB, 'Miki': Porous_Absorber_Miki}
+
+# Names of the parameters of each layer type, in the order of the layer list after the model name
+PARAMETERS = {
+    'Porous': ['thickness', 'sigma', 'phi', 'alpha_inf'],
+    'Microperforated Plate': ['thickness', 'd_hole', 'a'],
+    'Plate': ['thickness', 'density', 'E', 'nu', 'eta'],
+    'Air': ['thickness'],
+}
+
+
+def transfer_matrix(material, f, air_density, air_speed, viscosity, air_pressure, theta, precision='double'):
+    """Calculates the transfer matrix of one layer as it is entered in the calculator.
+
+    Args:
+        material (list): Model name and thickness in mm, followed by the model parameters in the order of the input
+            fields, e.g. ['Porous', 50, 10000, 0.98, 1.4]. Porous layers take the porous model as optional last
+            entry, one of POROUS_MODELS, by default 'JAC'.
+        f (float | np.ndarray): Frequency or array of frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        precision (str, optional): Working precision of the transfer matrix, 'double' or 'single'
+
+    Returns:
+        T (np.ndarray): Transfer matrix of the layer with shape (..., 2, 2)
+    """
+    f = np.asarray(f)
+    if precision == 'single':
+        # the wave number kx is calculated in float32 as well, see AbsorberModelInterface
+        f, air_speed, theta = (np.asarray(value, dtype=np.float32) for value in (f, air_speed, theta))
+    L1 = material[1] / 1000
+    kx = 2 * np.pi * f / air_speed * np.sin(theta)
+
+    if material[0] == 'Porous':
+        sigma, phi, alpha_inf = material[2:5]
+        porous_model = material[5] if len(material) > 5 else 'JAC'
+        if porous_model == 'JAC':
+            return Porous_Absorber_JAC(f, air_density, air_speed, L1, viscosity, sigma, air_pressure, phi, alpha_inf,
+                                       kx, precision).get_T()
+        if porous_model in POROUS_MODELS:
+            return POROUS_MODELS[porous_model](f, air_density, air_speed, L1, viscosity, sigma, kx,
+                                               precision).get_T()
+        raise ValueError(f"Invalid Porous Model: {porous_model}")
+    if material[0] == 'Microperforated Plate':
+        d_hole, a = material[2:4]
+        return PerforatedPlate_Absorber(f, air_density, air_speed, L1, viscosity, d_hole, a, precision).get_T()
+    if material[0] == 'Plate':
+        density, E, nu, eta = material[2:6]
+        return Plate_Absorber(f, air_density, air_speed, L1, viscosity, theta, density, E, nu, eta,
+                              precision).get_T()
+    if material[0] == 'Air':
+        return Air_Absorber(f, air_density, air_speed, L1, viscosity, kx, precision).get_T()
+    raise ValueError(f"Invalid Model: {material[0]}")
+
@@ -0,0 +1,229 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import absorptioncoeff, compare, models
+from .pipeline import frequency_chunks
+
+DEFAULT_CHUNK_SIZE = 2048
+DEFAULT_STACKS_PER_TASK = 128
+
+_BLAS_THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+
+def default_workers():
+    """Number of worker threads that does not oversubscribe the cores.
+
+    If BLAS is configured to use several threads through the usual environment variables, the number of workers is
+    reduced accordingly.
+
+    Returns:
+        int: Number of worker threads
+    """
+    blas_threads = max([int(os.environ.get(name, 1) or 1) for name in _BLAS_THREAD_VARIABLES])
+    return max(1, (os.cpu_count() or 1) // blas_threads)
+
+
+@contextmanager
+def limit_blas_threads():
+    """Limits BLAS to one thread while the worker threads are running, if threadpoolctl is installed."""
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        yield
+        return
+    with threadpool_limits(limits=1, user_api='blas'):
+        yield
+
+
+def solve_threaded(materials, f, air_density, air_speed, viscosity, air_pressure, theta, workers=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, precision='double'):
+    """Calculates the absorption coefficient with a thread pool.
+
+    The frequencies are split into blocks and the transfer matrix of every layer in every block is evaluated as a
+    separate task. NumPy releases the GIL inside its ufuncs, so the tasks run concurrently within one process.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        workers (int, optional): Number of threads, defaults to default_workers()
+        chunk_size (int, optional): Maximum number of frequencies per block
+        precision (str, optional): Working precision of the transfer matrices, 'double' or 'single'
+
+    Returns:
+        alpha (np.ndarray): Absorption coefficient for each frequency
+    """
+    Z0 = air_speed * air_density
+    chunks = list(frequency_chunks(f, chunk_size))
+    with limit_blas_threads(), ThreadPoolExecutor(workers or default_workers()) as executor:
+        futures = [[executor.submit(models.transfer_matrix, material, f_chunk, air_density, air_speed, viscosity,
+                                    air_pressure, theta, precision) for material in materials]
+                   for f_chunk in chunks]
+        alphas = [absorptioncoeff.AbsorptionCoeff((future.result() for future in chunk), Z0, theta).abs_coeff()
+                  for chunk in futures]
+    return np.concatenate(alphas) if alphas else np.array([])
+
+
+def solve_many(stacks, f, air_density, air_speed, viscosity, air_pressure, theta, workers=None, precision='double',
+               backend=None):
+    """Calculates the absorption coefficient of independent stacks concurrently.
+
+    Args:
+        stacks (list): Stacks of materials, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        workers (int, optional): Number of threads, defaults to default_workers()
+        precision (str, optional): Working precision of the transfer matrices, 'double' or 'single'
+        backend (str, optional): 'numpy' or 'numba', see absorptioncoeff.solve
+
+    Returns:
+        list: Absorption coefficient of each stack
+    """
+    with limit_blas_threads(), ThreadPoolExecutor(workers or default_workers()) as executor:
+        futures = [executor.submit(absorptioncoeff.solve, materials, f, air_density, air_speed, viscosity,
+                                   air_pressure, theta, precision, backend) for materials in stacks]
+        return [future.result() for future in futures]
+
+
+def process_pool(workers=None):
+    """Process pool for the shared memory functions.
+
+    The workers are started with the spawn method, forking a process in which the parallel Numba runtime is running
+    can deadlock. Starting the workers takes about a second, so a pool should be reused for many calls.
+
+    Args:
+        workers (int, optional): Number of processes, defaults to default_workers()
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: Process pool
+    """
+    return ProcessPoolExecutor(workers or default_workers(), mp_context=multiprocessing.get_context('spawn'))
+
+
+def _write_shared(descriptor, index, values):
+    """Writes values into a slice of an array in shared memory, in a worker process."""
+    name, shape, dtype = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray(shape, dtype, buffer=block.buf)
+        out[index] = values
+        del out
+    finally:
+        block.close()
+
+
+def _matrix_task(descriptor, index, material, f, air_density, air_speed, viscosity, air_pressure, theta, precision):
+    T = models.transfer_matrix(material, f, air_density, air_speed, viscosity, air_pressure, theta, precision)
+    _write_shared(descriptor, index, T)
+
+
+def _population_task(descriptor, index, stacks, f, air_density, air_speed, viscosity, air_pressure, theta, precision):
+    alpha = compare.compare_stacks(stacks, f, air_density, air_speed, viscosity, air_pressure, theta,
+                                   precision=precision)
+    _write_shared(descriptor, index, alpha)
+
+
+def _run_shared(executor, workers, shape, dtype, tasks):
+    """Runs tasks that write into one array in shared memory and returns a copy of the array.
+
+    Only the name, shape and dtype of the shared memory block and the slice of every task are sent to the workers,
+    the results are never pickled.
+    """
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    try:
+        descriptor = (block.name, shape, dtype.str)
+        pool = executor or process_pool(workers)
+        try:
+            futures = [pool.submit(function, descriptor, *args) for function, *args in tasks]
+            for future in futures:
+                future.result()
+        finally:
+            if executor is None:
+                pool.shutdown()
+        return np.ndarray(shape, dtype, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def transfer_matrix_processes(material, f, air_density, air_speed, viscosity, air_pressure, theta, executor=None,
+                              workers=None, chunk_size=DEFAULT_CHUNK_SIZE, precision='double'):
+    """Calculates the transfer matrices of a layer in worker processes, like models.transfer_matrix.
+
+    The frequencies are split into blocks and every worker writes the matrices of its block directly into an array
+    in shared memory allocated by the parent, so the (P, N, 2, 2) result is not pickled back.
+
+    Args:
+        material (list): Layer, see models.transfer_matrix for the format, may be a population layer of
+            compare.population_layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        executor (concurrent.futures.ProcessPoolExecutor, optional): Pool of process_pool, a new pool is started
+            and stopped if not given
+        workers (int, optional): Number of processes of a new pool, defaults to default_workers()
+        chunk_size (int, optional): Maximum number of frequencies per task
+        precision (str, optional): Working precision of the transfer matrices, 'double' or 'single'
+
+    Returns:
+        np.ndarray: Transfer matrices with the shape of models.transfer_matrix
+    """
+    f = np.asarray(f)
+    # the leading axes and dtype of the result, from the first frequency
+    sample = models.transfer_matrix(material, f[:1], air_density, air_speed, viscosity, air_pressure, theta,
+                                    precision)
+    shape = sample.shape[:-3] + (len(f), 2, 2)
+    tasks = [(_matrix_task, (Ellipsis, slice(start, start + chunk_size), slice(None), slice(None)), material,
+              f[start:start + chunk_size], air_density, air_speed, viscosity, air_pressure, theta, precision)
+             for start in range(0, len(f), chunk_size)]
+    return _run_shared(executor, workers, shape, sample.dtype, tasks)
+
+
+def solve_many_processes(stacks, f, air_density, air_speed, viscosity, air_pressure, theta, executor=None,
+                         workers=None, chunk_size=DEFAULT_CHUNK_SIZE, stacks_per_task=DEFAULT_STACKS_PER_TASK,
+                         precision='double'):
+    """Calculates the absorption coefficient of many stacks in worker processes.
+
+    Every task evaluates a block of stacks on a block of frequencies with compare.compare_stacks and writes its
+    absorption coefficients directly into an array in shared memory allocated by the parent.
+
+    Args:
+        stacks (list): Stacks of materials, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        executor (concurrent.futures.ProcessPoolExecutor, optional): See transfer_matrix_processes
+        workers (int, optional): Number of processes of a new pool, defaults to default_workers()
+        chunk_size (int, optional): Maximum number of frequencies per task
+        stacks_per_task (int, optional): Maximum number of stacks per task
+        precision (str, optional): Working precision of the transfer matrices, 'double' or 'single'
+
+    Returns:
+        np.ndarray: Absorption coefficient with shape (P, N), in the order of the stacks
+    """
+    f = np.asarray(f)
+    tasks = [(_population_task, (slice(start, start + stacks_per_task), slice(f_start, f_start + chunk_size)),
+              stacks[start:start + stacks_per_task], f[f_start:f_start + chunk_size], air_density, air_speed,
+              viscosity, air_pressure, theta, precision)
+             for start in range(0, len(stacks), stacks_per_task) for f_start in range(0, len(f), chunk_size)]
+    return _run_shared(executor, workers, (len(stacks), len(f)), np.float64, tasks)
@@ -0,0 +1,170 @@
+import csv
+
+import numpy as np
+
+from . import compare, models, ratings
+from .absorptioncoeff import AbsorptionCoeff
+from .bands import BandAccumulator
+
+DEFAULT_CHUNK_SIZE = 4096
+DEFAULT_MAX_ELEMENTS = 2_000_000
+
+
+def frequency_chunks(f, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Splits a frequency array into consecutive blocks.
+
+    Args:
+        f (np.ndarray): Frequencies
+        chunk_size (int, optional): Maximum number of frequencies per block
+
+    Yields:
+        np.ndarray: Block of frequencies
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    f = np.asarray(f)
+    for start in range(0, len(f), chunk_size):
+        yield f[start:start + chunk_size]
+
+
+def layer_matrices(materials, f, air_density, air_speed, viscosity, air_pressure, theta, precision='double'):
+    """Yields the transfer matrices of a stack one layer after the other.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        precision (str, optional): Working precision of the transfer matrices, 'double' or 'single'
+
+    Yields:
+        np.ndarray: Transfer matrix of one layer with shape (N, 2, 2)
+    """
+    for material in materials:
+        yield models.transfer_matrix(material, f, air_density, air_speed, viscosity, air_pressure, theta, precision)
+
+
+def stream_abs_coeff(stacks, f, air_density, air_speed, viscosity, air_pressure, theta,
+                     chunk_size=DEFAULT_CHUNK_SIZE, precision='double'):
+    """Calculates the absorption coefficient of many stacks block by block.
+
+    The stacks are consumed lazily and each frequency block is folded layer by layer, so at most one layer's
+    (chunk_size, 2, 2) matrix stack and the running product are held in memory, regardless of the number of
+    frequencies, layers or stacks.
+
+    Args:
+        stacks (iterable): Stacks of materials, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        chunk_size (int, optional): Maximum number of frequencies per block
+        precision (str, optional): Working precision of the transfer matrices, 'double' or 'single'
+
+    Yields:
+        tuple: Index of the stack, frequency block and absorption coefficient of the block
+    """
+    Z0 = air_speed * air_density
+    for i, materials in enumerate(stacks):
+        for f_chunk in frequency_chunks(f, chunk_size):
+            T = layer_matrices(materials, f_chunk, air_density, air_speed, viscosity, air_pressure, theta, precision)
+            yield i, f_chunk, AbsorptionCoeff(T, Z0, theta).abs_coeff()
+
+
+def write_csv(results, file):
+    """Writes the blocks of stream_abs_coeff to a CSV file as they arrive.
+
+    Args:
+        results (iterable): Output of stream_abs_coeff
+        file: Open text file
+
+    Returns:
+        int: Number of rows written
+    """
+    writer = csv.writer(file)
+    writer.writerow(['Stack', 'Frequency [Hz]', 'Absorption coefficient [1]'])
+    rows = 0
+    for i, f_chunk, alpha in results:
+        writer.writerows(zip([i] * len(f_chunk), f_chunk.tolist(), alpha.tolist()))
+        rows += len(f_chunk)
+    return rows
+
+
+def stream_band_means(results, plot_type='oct'):
+    """Folds the blocks of stream_abs_coeff into band means, one stack at a time.
+
+    Args:
+        results (iterable): Output of stream_abs_coeff
+        plot_type (str, optional): Type of bands. Options are 'oct' and 'third'.
+
+    Yields:
+        tuple: Index of the stack and its mean absorption coefficient per band, as soon as the stack is complete
+    """
+    current, accumulator = None, None
+    for i, f_chunk, alpha in results:
+        if i != current:
+            if accumulator is not None:
+                yield current, accumulator.means()
+            current, accumulator = i, BandAccumulator(plot_type)
+        accumulator.update(f_chunk, alpha)
+    if accumulator is not None:
+        yield current, accumulator.means()
+
+
+def band_statistics(stacks, f, air_density, air_speed, viscosity, air_pressure, theta,
+                    max_elements=DEFAULT_MAX_ELEMENTS, precision='double'):
+    """Calculates the band statistics and single number ratings of many stacks without storing their spectra.
+
+    The stacks are evaluated as population batches with compare.compare_stacks, in blocks of stacks and frequencies
+    of at most max_elements alpha values. Every block is folded into running per-band sums, counts, minima and maxima
+    and then discarded, so the memory is that of one block plus the band values of all stacks, independent of the
+    number of frequencies.
+
+    Args:
+        stacks (list): Stacks of materials, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        max_elements (int, optional): Maximum number of stacks times frequencies evaluated at once
+        precision (str, optional): Working precision of the transfer matrices, 'double' or 'single'
+
+    Returns:
+        dict: For 'oct' and 'third', the center frequencies and the mean, minimum and maximum absorption coefficient
+            per band with shape (P, bands), and the single number ratings of ratings.ratings with shape (P,)
+    """
+    f = np.asarray(f)
+    f_step = max(1, max_elements // max(len(stacks), 1))
+    stack_step = max(1, max_elements // f_step)
+
+    statistics = {}
+    for plot_type in ('oct', 'third'):
+        center_freqs = BandAccumulator(plot_type).center_freqs
+        statistics[plot_type] = {'center_freqs': center_freqs,
+                                 **{name: np.zeros((len(stacks), len(center_freqs))) for name in ('mean', 'min', 'max')}}
+    rating_bands = np.zeros((len(stacks), len(BandAccumulator('third', standard=True).center_freqs)))
+    for start in range(0, len(stacks), stack_step):
+        block = stacks[start:start + stack_step]
+        accumulators = {plot_type: BandAccumulator(plot_type) for plot_type in ('oct', 'third')}
+        rating_accumulator = BandAccumulator('third', standard=True)
+        for f_chunk in frequency_chunks(f, f_step):
+            alpha = compare.compare_stacks(block, f_chunk, air_density, air_speed, viscosity, air_pressure, theta,
+                                           precision=precision)
+            for accumulator in (*accumulators.values(), rating_accumulator):
+                accumulator.update(f_chunk, alpha)
+        rows = slice(start, start + len(block))
+        rating_bands[rows] = rating_accumulator.means()
+        for plot_type, accumulator in accumulators.items():
+            statistics[plot_type]['mean'][rows] = accumulator.means()
+            statistics[plot_type]['min'][rows] = accumulator.minima()
+            statistics[plot_type]['max'][rows] = accumulator.maxima()
+
+    statistics['ratings'] = ratings.ratings(rating_bands)
+    return statistics
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+PROFILE_VARIABLE = 'ABSORPTION_PROFILE'
+PROFILE_DIR_VARIABLE = 'ABSORPTION_PROFILE_DIR'
+DEFAULT_TOP = 20
+
+_lock = threading.Lock()
+_active = False
+
+
+def is_enabled():
+    """Whether profiling is switched on by the environment variable ABSORPTION_PROFILE, e.g. ABSORPTION_PROFILE=1."""
+    return os.environ.get(PROFILE_VARIABLE, '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+
+def profile_directory():
+    """Directory of the profiles, given by the environment variable ABSORPTION_PROFILE_DIR, defaults to ./profiles."""
+    return os.environ.get(PROFILE_DIR_VARIABLE, 'profiles')
+
+
+def hot_functions(stats, top=DEFAULT_TOP):
+    """The functions with the most own time of a profile.
+
+    Args:
+        stats (pstats.Stats): Profile statistics
+        top (int, optional): Number of functions
+
+    Returns:
+        list: One dict per function with the name and location, number of calls, own time and cumulative time in
+            seconds
+    """
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    return [{'function': f"{name} ({os.path.basename(file)}:{line})", 'calls': calls, 'own_time': own_time,
+             'cumulative_time': cumulative_time}
+            for (file, line, name), (_, calls, own_time, cumulative_time, _) in entries]
+
+
+class Profile:
+    """Opt-in cProfile and tracemalloc capture of a calculation.
+
+    Use it as context manager or with start() and stop(). When stopped, the profile is written to a timestamped text
+    file with the hot functions, the peak traced memory and the top allocations, next to the raw cProfile statistics
+    (.prof) for tools like snakeviz. Only one profile runs at a time, a profile started while another one is running
+    does nothing, so profiled functions can call each other. Errors writing the files are ignored, profiling never
+    makes a calculation fail.
+
+    Args:
+        label (str, optional): Name of the profile, the start of the file names
+        enabled (bool, optional): Whether to profile, defaults to is_enabled()
+        directory (str, optional): Directory of the files, defaults to profile_directory()
+        top (int, optional): Number of hot functions and allocations in the summary
+
+    Attributes:
+        path (str): Text file of the profile, None if nothing was written
+        elapsed (float): Wall time in seconds
+        peak (int): Peak traced memory in bytes
+        hot (list): Hot functions, see hot_functions
+        allocations (list): (location, size in bytes, number of blocks) of the largest allocations alive at the end
+    """
+
+    def __init__(self, label='solve', enabled=None, directory=None, top=DEFAULT_TOP):
+        self.label = label
+        self.enabled = is_enabled() if enabled is None else enabled
+        self.directory = directory or profile_directory()
+        self.top = top
+        self.path = None
+        self.elapsed = None
+        self.peak = None
+        self.hot = []
+        self.allocations = []
+        self._profiler = None
+        self._started_tracing = False
+        self._start_time = None
+
+    def start(self):
+        """Starts profiling if enabled and no other profile is running."""
+        global _active
+        if not self.enabled or self._profiler is not None:
+            return self
+        with _lock:
+            if _active:
+                return self
+            _active = True
+
+        import cProfile
+
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        self._profiler = cProfile.Profile()
+        self._start_time = time.perf_counter()
+        self._profiler.enable()
+        return self
+
+    def stop(self):
+        """Stops profiling and writes the profile."""
+        global _active
+        if self._profiler is None:
+            return self
+        self._profiler.disable()
+        self.elapsed = time.perf_counter() - self._start_time
+        _, self.peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        import pstats
+
+        stats = pstats.Stats(self._profiler)
+        self.hot = hot_functions(stats, self.top)
+        self.allocations = [(str(statistic.traceback), statistic.size, statistic.count)
+                            for statistic in snapshot.statistics('lineno')[:self.top]]
+        self._profiler = None
+        with _lock:
+            _active = False
+        self.path = self._write(stats)
+        return self
+
+    def _write(self, stats):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, f"{self.label}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}")
+            stats.dump_stats(base + '.prof')
+            with open(base + '.txt', 'w', encoding='utf-8') as file:
+                file.write(f"Profile {self.label}: {self.elapsed:.6f} s, peak traced memory "
+                           f"{self.peak / 1024 ** 2:.3f} MB\n\nHot functions (own time):\n")
+                for function in self.hot:
+                    file.write(f"{function['own_time']:12.6f} s {function['cumulative_time']:12.6f} s "
+                               f"{function['calls']:10d}  {function['function']}\n")
+                file.write("\nTop allocations:\n")
+                for location, size, count in self.allocations:
+                    file.write(f"{size / 1024:12.1f} KiB {count:10d}  {location}\n")
+                file.write("\n")
+                stats.stream = file
+                stats.sort_stats('cumulative').print_stats(self.top)
+        except OSError:
+            return None
+        return base + '.txt'
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
@@ -0,0 +1,155 @@
+import numpy as np
+
+from .bands import THIRD_OCTAVE_CENTER_FREQS, band_means
+
+NRC_FREQS = [250, 500, 1000, 2000]
+SAA_FREQS = [200, 250, 315, 400, 500, 630, 800, 1000, 1250, 1600, 2000, 2500]
+ALPHA_W_FREQS = [250, 500, 1000, 2000, 4000]
+ALPHA_W_REFERENCE = np.array([0.8, 1.0, 1.0, 1.0, 0.9])
+ALPHA_W_SHIFTS = -np.arange(21) * 0.05
+ABSORPTION_CLASSES = [(0.90, 'A'), (0.80, 'B'), (0.60, 'C'), (0.30, 'D'), (0.15, 'E')]
+
+
+def _round_to(values, step):
+    """Rounds to the nearest multiple of step, without floating point noise in the result."""
+    return np.round(np.round(np.asarray(values) / step) * step, 2)
+
+
+def rating_bands(alpha, f):
+    """Third octave band values of standard width, fc * 2^(-1/6) to fc * 2^(1/6), on which all ratings are based.
+
+    Args:
+        alpha (np.ndarray): Absorption coefficient, the frequency has to be the last axis
+        f (np.ndarray): Frequencies of alpha
+
+    Returns:
+        np.ndarray: Mean value per third octave band of THIRD_OCTAVE_CENTER_FREQS
+    """
+    return band_means(f, alpha, 'third', standard=True)
+
+
+def _bands(alpha, f, selected):
+    """Selects the third octave band values at the given center frequencies, from a spectrum or from band values."""
+    values = rating_bands(alpha, f) if f is not None else np.asarray(alpha)
+    return values[..., [THIRD_OCTAVE_CENTER_FREQS.index(freq) for freq in selected]]
+
+
+def nrc(alpha, f=None):
+    """Noise reduction coefficient according to ASTM C423, the mean of the third octave bands 250 Hz, 500 Hz, 1 kHz
+    and 2 kHz rounded to 0.05.
+
+    Args:
+        alpha (np.ndarray): Absorption coefficient with shape (P, N), or third octave band values of rating_bands
+            with shape (P, 30) if f is not given
+        f (np.ndarray, optional): Frequencies of alpha
+
+    Returns:
+        np.ndarray: NRC per configuration
+    """
+    return _round_to(_bands(alpha, f, NRC_FREQS).mean(axis=-1), 0.05)
+
+
+def saa(alpha, f=None):
+    """Sound absorption average according to ASTM C423, the mean of the twelve third octave bands 200 Hz to 2.5 kHz
+    rounded to 0.01.
+
+    Args:
+        alpha (np.ndarray): Absorption coefficient with shape (P, N), or third octave band values of rating_bands
+            with shape (P, 30) if f is not given
+        f (np.ndarray, optional): Frequencies of alpha
+
+    Returns:
+        np.ndarray: SAA per configuration
+    """
+    return _round_to(_bands(alpha, f, SAA_FREQS).mean(axis=-1), 0.01)
+
+
+def practical_coefficients(alpha, f=None):
+    """Practical sound absorption coefficients according to ISO 11654 of the octaves 250 Hz to 4 kHz.
+
+    Each is the mean of the three third octave bands of the octave, rounded to 0.05 and limited to 1.
+
+    Args:
+        alpha (np.ndarray): Absorption coefficient with shape (P, N), or third octave band values of rating_bands
+            with shape (P, 30) if f is not given
+        f (np.ndarray, optional): Frequencies of alpha
+
+    Returns:
+        np.ndarray: Practical coefficients with shape (P, 5)
+    """
+    thirds = [THIRD_OCTAVE_CENTER_FREQS[THIRD_OCTAVE_CENTER_FREQS.index(freq) + offset]
+              for freq in ALPHA_W_FREQS for offset in (-1, 0, 1)]
+    values = _bands(alpha, f, thirds)
+    octaves = values.reshape(values.shape[:-1] + (len(ALPHA_W_FREQS), 3)).mean(axis=-1)
+    return np.minimum(_round_to(octaves, 0.05), 1.0)
+
+
+def alpha_w(alpha, f=None):
+    """Weighted sound absorption coefficient and shape indicators according to ISO 11654.
+
+    The reference curve is shifted in steps of 0.05 until the sum of the unfavourable deviations from the practical
+    absorption coefficients is at most 0.10. All shifts are evaluated for all configurations at once.
+
+    Args:
+        alpha (np.ndarray): Absorption coefficient with shape (P, N), or third octave band values of rating_bands
+            with shape (P, 30) if f is not given
+        f (np.ndarray, optional): Frequencies of alpha
+
+    Returns:
+        tuple: alpha_w per configuration and the shape indicators ('L', 'M', 'H' or combinations) per configuration
+    """
+    alpha_p = practical_coefficients(alpha, f)
+
+    # (..., shifts, bands) deviations of every shifted reference curve
+    reference = ALPHA_W_REFERENCE + ALPHA_W_SHIFTS[:, None]
+    unfavourable = np.clip(reference - alpha_p[..., None, :], 0, None).sum(axis=-1)
+    first_fit = np.argmax(unfavourable <= 0.10 + 1e-9, axis=-1)
+    shifted = reference[first_fit]
+    aw = np.round(shifted[..., 1], 2)
+
+    excess = alpha_p - shifted >= 0.25 - 1e-9
+    indicators = np.stack([excess[..., 0], excess[..., 1] | excess[..., 2], excess[..., 3] | excess[..., 4]], axis=-1)
+    shape = np.array([''.join(letter for letter, flag in zip('LMH', flags) if flag)
+                      for flags in indicators.reshape(-1, 3)]).reshape(indicators.shape[:-1])
+    return aw, shape
+
+
+def absorption_class(aw):
+    """Sound absorption class according to ISO 11654, '-' for not classified.
+
+    Args:
+        aw (np.ndarray): Weighted sound absorption coefficient per configuration
+
+    Returns:
+        np.ndarray: Class per configuration
+    """
+    aw = np.asarray(aw)
+    classes = np.full(aw.shape, '-')
+    for limit, name in reversed(ABSORPTION_CLASSES):
+        classes[aw >= limit - 1e-9] = name
+    return classes
+
+
+def ratings(alpha, f=None):
+    """Calculates all single number ratings of many configurations.
+
+    The ratings are based on third octave bands of standard width, see rating_bands, not on the wider bands of the
+    band plots of the calculator.
+
+    Args:
+        alpha (np.ndarray): Absorption coefficient with shape (P, N), or third octave band values of rating_bands
+            with shape (P, 30) if f is not given
+        f (np.ndarray, optional): Frequencies of alpha
+
+    Returns:
+        dict: NRC, SAA, alpha_w, shape indicators and absorption class, each with shape (P,)
+    """
+    thirds = rating_bands(alpha, f) if f is not None else np.asarray(alpha)
+    aw, shape = alpha_w(thirds)
+    return {
+        'NRC': nrc(thirds),
+        'SAA': saa(thirds),
+        'alpha_w': aw,
+        'shape': shape,
+        'class': absorption_class(aw),
+    }
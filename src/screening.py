@@ -0,0 +1,71 @@
+import numpy as np
+
+from .compare import compare_stacks
+
+
+def mean_alpha(alpha, f):
+    """Default screening metric, the mean absorption coefficient over all frequencies.
+
+    Args:
+        alpha (np.ndarray): Absorption coefficient with shape (P, N)
+        f (np.ndarray): Frequencies
+
+    Returns:
+        np.ndarray: Metric per configuration
+    """
+    return alpha.mean(axis=-1)
+
+
+def with_porous_model(materials, porous_model):
+    """Returns a copy of the stack in which every porous layer uses the given porous model.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        porous_model (str): One of models.POROUS_MODELS
+
+    Returns:
+        list: Layers of the modified stack
+    """
+    return [list(material[:5]) + [porous_model] if material[0] == 'Porous' else list(material)
+            for material in materials]
+
+
+def screen(stacks, f, air_density, air_speed, viscosity, air_pressure, theta, target, metric=mean_alpha,
+           margin=0.05, screening_model='DB'):
+    """Two-stage evaluation of many candidate stacks.
+
+    All candidates are first evaluated with the cheap empirical model in place of every porous layer. Candidates whose
+    screening metric is below target - margin are discarded, the survivors are evaluated with the porous models chosen
+    for their layers (JAC by default). The margin accounts for the deviation between the empirical and the
+    JAC model, which is largest outside the validity range of the empirical models.
+
+    Args:
+        stacks (list): Candidate stacks, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        target (float): Minimum value of the metric
+        metric (callable, optional): Function of the absorption coefficient (P, N) and the frequencies returning one
+            value per candidate, e.g. ratings.nrc
+        margin (float, optional): Safety margin of the screening stage
+        screening_model (str, optional): Porous model of the screening stage, 'DB' or 'Miki'
+
+    Returns:
+        dict: Indices of the survivors, screening metric of all candidates, absorption coefficient and metric of the
+            survivors
+    """
+    screening_stacks = [with_porous_model(materials, screening_model) for materials in stacks]
+    screened = np.asarray(metric(compare_stacks(screening_stacks, f, air_density, air_speed, viscosity, air_pressure,
+                                                theta), f))
+    survivors = np.flatnonzero(screened >= target - margin)
+
+    alphas = compare_stacks([stacks[i] for i in survivors], f, air_density, air_speed, viscosity, air_pressure, theta)
+    return {
+        'survivors': survivors,
+        'screening_metric': screened,
+        'alpha': alphas,
+        'metric': np.asarray(metric(alphas, f)) if len(survivors) else np.array([]),
+    }
@@ -0,0 +1,102 @@
+import numpy as np
+
+from . import models
+from .bands import band_means
+from .uncertainty import DEFAULT_MAX_ELEMENTS, parameter_index, solve_samples
+
+DEFAULT_STEP = 1e-5
+
+
+def layer_parameters(materials):
+    """All numeric parameters of a stack.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+
+    Returns:
+        list: (layer index, parameter name) of every parameter, see models.PARAMETERS
+    """
+    return [(layer, name) for layer, material in enumerate(materials) for name in models.PARAMETERS[material[0]]]
+
+
+def jacobian(materials, f, air_density, air_speed, viscosity, air_pressure, theta, parameters=None, step=DEFAULT_STEP,
+             max_elements=DEFAULT_MAX_ELEMENTS):
+    """Derivatives of the absorption coefficient with respect to the layer parameters.
+
+    The models are complex valued and alpha depends on the magnitude of the reflection factor, which is not an
+    analytic function, so the complex step method does not apply. Central differences are used instead. The nominal
+    stack and the two perturbed stacks of every parameter are evaluated as one population batch.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        parameters (list, optional): (layer index, parameter name) of the parameters, defaults to all parameters
+        step (float, optional): Relative step of the central differences, absolute for parameters equal to 0
+        max_elements (int, optional): Maximum number of stacks times frequencies evaluated at once
+
+    Returns:
+        tuple: Absorption coefficient for each frequency and the jacobian with shape (N, len(parameters)), as used
+            by scipy.optimize.least_squares
+    """
+    f = np.asarray(f)
+    parameters = layer_parameters(materials) if parameters is None else list(parameters)
+    nominal = np.array([materials[layer][parameter_index(materials, layer, name)] for layer, name in parameters],
+                       dtype=float)
+    h = step * np.where(nominal != 0, np.abs(nominal), 1)
+
+    # stack 0 is the nominal one, stacks 2i + 1 and 2i + 2 are perturbed by +h and -h in parameter i
+    n_stacks = 2 * len(parameters) + 1
+    values = np.repeat(nominal[:, None], n_stacks, axis=1)
+    index = np.arange(len(parameters))
+    values[index, 2 * index + 1] += h
+    values[index, 2 * index + 2] -= h
+    samples = dict(zip(parameters, values))
+
+    f_step = max(1, max_elements // n_stacks)
+    alpha = np.empty((n_stacks, len(f)))
+    for start in range(0, len(f), f_step):
+        alpha[:, start:start + f_step] = solve_samples(materials, samples, 0, n_stacks, f[start:start + f_step],
+                                                       air_density, air_speed, viscosity, air_pressure, theta)
+    return alpha[0], ((alpha[1::2] - alpha[2::2]) / (2 * h[:, None])).T
+
+
+def sensitivity(materials, f, air_density, air_speed, viscosity, air_pressure, theta, parameters=None,
+                plot_type='oct', step=DEFAULT_STEP):
+    """Sensitivity of the absorption coefficient to every layer parameter, per frequency and per band.
+
+    The relative sensitivity x * d alpha / d x is the change of alpha for a relative change of the parameter, which
+    makes parameters of different units comparable.
+
+    Args:
+        materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        parameters (list, optional): (layer index, parameter name) of the parameters, defaults to all parameters
+        plot_type (str, optional): Type of bands. Options are 'oct' and 'third'.
+        step (float, optional): See jacobian
+
+    Returns:
+        dict: Parameters, absorption coefficient, jacobian (N, P), relative sensitivity (P, N) and its band means
+            (P, bands)
+    """
+    parameters = layer_parameters(materials) if parameters is None else list(parameters)
+    alpha, J = jacobian(materials, f, air_density, air_speed, viscosity, air_pressure, theta, parameters, step)
+    nominal = np.array([materials[layer][parameter_index(materials, layer, name)] for layer, name in parameters],
+                       dtype=float)
+    relative = J.T * nominal[:, None]
+    return {
+        'parameters': parameters,
+        'alpha': alpha,
+        'jacobian': J,
+        'relative': relative,
+        'bands': band_means(f, relative, plot_type),
+    }
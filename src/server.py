@@ -0,0 +1,319 @@
+"""HTTP JSON service of the solver, run with `python -m src.server`.
+
+POST /solve with a JSON object:
+
+    {
+        "materials": [["Porous", 50, 10000, 0.98, 1.01], ["Air", 50]],
+        "f": [100, 200, 400] or {"start": 1, "stop": 20000, "step": 1},
+        "air_density": 1.204, "air_speed": 343.2, "viscosity": 1.81e-5, "air_pressure": 101325,
+        "theta": 0,
+        "bands": "oct",
+        "format": "json",
+        "measured": {"f": [100, 125, 160], "alpha": [0.12, 0.18, 0.25]}
+    }
+
+Only "materials" is required. The frequencies default to library.STANDARD_F, the air to the standard conditions of
+library.standard_air() and theta (in radians) to 0. The response contains the frequencies, the absorption
+coefficient and, if "bands" is 'oct' or 'third', the band centers and band means. With "format": "npy" the response
+is the absorption coefficient as binary NumPy array instead. With "measured", the stack is also evaluated at the
+measured frequencies and the response contains the residuals of measurements.residuals, in the bands given by "bands"
+or in third octave bands. Values that are not finite are null in the JSON response.
+
+GET /health returns {"status": "ok"}.
+"""
+import argparse
+import hashlib
+import io
+import json
+import math
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from . import bands, compare, library, measurements, models
+
+DEFAULT_MAX_LATENCY = 0.01
+DEFAULT_MAX_BATCH = 64
+# parameters that are only physically meaningful if positive, e.g. a flow resistivity of 0 gives NaN
+POSITIVE_PARAMETERS = ('thickness', 'sigma', 'phi', 'alpha_inf', 'd_hole', 'a')
+
+
+class Batcher:
+    """Collects concurrent requests and solves requests with the same topology, frequencies and air conditions as one
+    population batch.
+
+    A batch is solved at the latest max_latency seconds after its first request arrived, or as soon as it has
+    max_batch requests.
+
+    Args:
+        max_latency (float, optional): Maximum waiting time of a request for other requests in seconds
+        max_batch (int, optional): Maximum number of requests per batch
+    """
+
+    def __init__(self, max_latency=DEFAULT_MAX_LATENCY, max_batch=DEFAULT_MAX_BATCH):
+        self.max_latency = max_latency
+        self.max_batch = max_batch
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def submit(self, materials, f, air_density, air_speed, viscosity, air_pressure, theta):
+        """Queues a calculation.
+
+        Args:
+            materials (list): Layers of the stack, see models.transfer_matrix for the format of each layer
+            f (np.ndarray): Frequencies
+            air_density (float): Density of air
+            air_speed (float): Speed of air
+            viscosity (float): Viscosity of air
+            air_pressure (float): Air pressure
+            theta (float): Angle of incidence in radians
+
+        Returns:
+            concurrent.futures.Future: Future of the absorption coefficient for each frequency
+        """
+        f = np.asarray(f, dtype=float)
+        conditions = (air_density, air_speed, viscosity, air_pressure, theta)
+        key = (compare.topology(materials), hashlib.sha256(f.tobytes()).hexdigest(), conditions)
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The batcher is closed")
+            batch = self._pending.setdefault(key, {'deadline': time.monotonic() + self.max_latency,
+                                                   'f': f, 'conditions': conditions, 'requests': []})
+            batch['requests'].append((materials, future))
+            if len(batch['requests']) >= self.max_batch:
+                batch['deadline'] = 0
+            self._condition.notify()
+        return future
+
+    def close(self):
+        """Solves the pending batches and stops the dispatcher thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    due = [key for key, batch in self._pending.items() if batch['deadline'] <= now or self._closed]
+                    if due or (self._closed and not self._pending):
+                        break
+                    deadlines = [batch['deadline'] for batch in self._pending.values()]
+                    self._condition.wait(min(deadlines) - now if deadlines else None)
+                if not due:
+                    return
+                batches = [self._pending.pop(key) for key in due]
+            for batch in batches:
+                self._solve(batch)
+
+    @staticmethod
+    def _solve(batch):
+        requests = batch['requests']
+        try:
+            alphas = compare.solve_population([materials for materials, _ in requests], batch['f'],
+                                              *batch['conditions'])
+        except Exception as e:
+            if len(requests) == 1:
+                requests[0][1].set_exception(e)
+                return
+            # solve the requests one by one, so that one invalid request does not fail the others
+            for materials, future in requests:
+                try:
+                    alpha = compare.solve_population([materials], batch['f'], *batch['conditions'])[0]
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(np.array(alpha))
+            return
+        for alpha, (_, future) in zip(alphas, requests):
+            future.set_result(np.array(alpha))
+
+
+def check_layer(material):
+    """Checks the model name, the number, type and sign of the parameters and the options of a layer.
+
+    Layers with the same topology are batched, so a layer with missing parameters would fail the whole batch.
+
+    Args:
+        material (list): Layer, see models.transfer_matrix for the format
+    """
+    names = models.PARAMETERS.get(material[0])
+    if names is None:
+        raise ValueError(f"Invalid Model: {material[0]}")
+    values, options = material[1:len(names) + 1], material[len(names) + 1:]
+    if len(values) != len(names) or not all(isinstance(value, (int, float)) and not isinstance(value, bool)
+                                            for value in values):
+        raise ValueError(f"Invalid Layer: {material[0]} needs the numeric parameters {', '.join(names)}")
+    for name, value in zip(names, values):
+        if not math.isfinite(value) or (name in POSITIVE_PARAMETERS and value <= 0):
+            raise ValueError(f"Invalid Layer: {name} of {material[0]} has to be "
+                             f"{'positive' if name in POSITIVE_PARAMETERS else 'finite'}, not {value}")
+    if options and (material[0] != 'Porous' or len(options) > 1 or options[0] not in models.POROUS_MODELS):
+        raise ValueError(f"Invalid Layer: unknown options {options} for {material[0]}")
+
+
+def parse_request(request):
+    """Validates a request of the service and fills in the defaults.
+
+    Args:
+        request (dict): Decoded JSON body of a request, see the module documentation
+
+    Returns:
+        dict: Arguments of Batcher.submit and the options 'bands', 'format' and 'measured'
+    """
+    if not isinstance(request, dict) or not isinstance(request.get('materials'), list) or not request['materials']:
+        raise ValueError("The request needs a non-empty list 'materials'")
+    if not all(isinstance(material, list) and material and isinstance(material[0], str)
+               for material in request['materials']):
+        raise ValueError("Every material is a list starting with the model name")
+    for material in request['materials']:
+        check_layer(material)
+
+    f = request.get('f')
+    if f is None:
+        f = library.STANDARD_F
+    elif isinstance(f, dict):
+        f = np.arange(f['start'], f['stop'], f.get('step', 1))
+    f = np.asarray(f, dtype=float)
+    if f.ndim != 1 or not len(f) or not np.all(f > 0):
+        raise ValueError("The frequencies have to be a non-empty list of positive values")
+
+    air_density, air_speed, viscosity = library.standard_air()
+    if request.get('bands') not in (None, 'oct', 'third'):
+        raise ValueError("Invalid Plot Type")
+    if request.get('format', 'json') not in ('json', 'npy'):
+        raise ValueError(f"Invalid Format: {request['format']}")
+
+    measured = request.get('measured')
+    if measured is not None:
+        measured = {'f': np.asarray(measured['f'], dtype=float), 'alpha': np.asarray(measured['alpha'], dtype=float)}
+        if measured['f'].ndim != 1 or not len(measured['f']) or measured['f'].shape != measured['alpha'].shape:
+            raise ValueError("Invalid Measurement: 'f' and 'alpha' have to be non-empty lists of equal length")
+        if not np.all(measured['f'] > 0):
+            raise ValueError("Invalid Measurement: the frequencies have to be positive")
+    return {
+        'materials': request['materials'],
+        'f': f,
+        'air_density': float(request.get('air_density', air_density)),
+        'air_speed': float(request.get('air_speed', air_speed)),
+        'viscosity': float(request.get('viscosity', viscosity)),
+        'air_pressure': float(request.get('air_pressure', library.STANDARD_PRESSURE)),
+        'theta': float(request.get('theta', 0)),
+        'bands': request.get('bands'),
+        'format': request.get('format', 'json'),
+        'measured': measured,
+    }
+
+
+def _to_json(value):
+    """Converts arrays and NumPy scalars to JSON values, NaN and infinite values to null."""
+    value = np.asarray(value)
+    if value.dtype.kind == 'f':
+        return np.where(np.isfinite(value), value.astype(object), None).tolist()
+    return value.tolist()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Handler of the service, the batcher is the attribute batcher of the server."""
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/solve':
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            args = parse_request(json.loads(self.rfile.read(length)))
+            options = {name: args.pop(name) for name in ('bands', 'format', 'measured')}
+            future = self.server.batcher.submit(**args)
+            measured = options['measured']
+            if measured is not None:
+                # the measured frequencies are a second request, which is batched with other requests on them
+                model = self.server.batcher.submit(**{**args, 'f': measured['f']}).result()
+            alpha = future.result()
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        if options['format'] == 'npy':
+            buffer = io.BytesIO()
+            np.save(buffer, alpha)
+            self._send(200, 'application/octet-stream', buffer.getvalue())
+            return
+        response = {'f': args['f'].tolist(), 'alpha': _to_json(alpha)}
+        if options['bands']:
+            response['band_centers'] = [band['center_frequency'] for band in bands.freq_bands(options['bands'])]
+            response['band_alpha'] = _to_json(bands.band_means(args['f'], alpha, options['bands']))
+        if measured is not None:
+            metrics = measurements.residuals(measured['f'], measured['alpha'], model, options['bands'] or 'third')
+            response['measurement'] = {'f': measured['f'].tolist(), 'alpha_model': _to_json(model),
+                                       **{name: _to_json(value) for name, value in metrics.items()}}
+        self._send_json(200, response)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, data):
+        self._send(status, 'application/json', json.dumps(data).encode('utf-8'))
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_server(host='127.0.0.1', port=8000, max_latency=DEFAULT_MAX_LATENCY, max_batch=DEFAULT_MAX_BATCH):
+    """Creates the HTTP server of the service, start it with serve_forever().
+
+    Args:
+        host (str, optional): Address to listen on
+        port (int, optional): Port to listen on, 0 for any free port
+        max_latency (float, optional): See Batcher
+        max_batch (int, optional): See Batcher
+
+    Returns:
+        http.server.ThreadingHTTPServer: Server with the attribute batcher
+    """
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.batcher = Batcher(max_latency, max_batch)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP JSON service of the absorption coefficient calculator")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-latency', type=float, default=DEFAULT_MAX_LATENCY,
+                        help="maximum time in seconds a request waits for other requests of its batch")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.max_latency, args.max_batch)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import itertools
+
+import numpy as np
+
+from . import absorptioncoeff
+from .uncertainty import DEFAULT_MAX_ELEMENTS, parameter_index, solve_samples
+
+METHODS = ('linear', 'rbf')
+
+
+def stack_with(materials, values):
+    """Returns a copy of the stack with the given parameter values.
+
+    Args:
+        materials (list): Nominal stack, see models.transfer_matrix for the format of each layer
+        values (dict): Parameter value by (layer index, parameter name)
+
+    Returns:
+        list: Layers of the modified stack
+    """
+    stack = [list(material) for material in materials]
+    for (layer, parameter), value in values.items():
+        stack[layer][parameter_index(materials, layer, parameter)] = value
+    return stack
+
+
+class Surrogate:
+    """Interpolated response of a stack over a sparse grid of varied parameters, for interactive previews.
+
+    The absorption coefficient is calculated once at every point of the grid, in population batches. Afterwards the
+    response for any parameter values inside the grid is interpolated in microseconds. The interpolation error is
+    estimated by comparing with exact calculations at random points inside the grid.
+
+    Args:
+        materials (list): Nominal stack, see models.transfer_matrix for the format of each layer
+        grid (dict): Ascending grid values by (layer index, parameter name), e.g. {(0, 'sigma'): [5000, 10000, 20000]}
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        method (str, optional): 'linear' for multilinear or 'rbf' for radial basis function interpolation
+        n_check (int, optional): Number of random points of the error estimate
+        seed (int, optional): Seed of the random points of the error estimate
+        max_elements (int, optional): Maximum number of grid points times frequencies evaluated at once
+    """
+
+    def __init__(self, materials, grid, f, air_density, air_speed, viscosity, air_pressure, theta, method='linear',
+                 n_check=16, seed=None, max_elements=DEFAULT_MAX_ELEMENTS):
+        if method not in METHODS:
+            raise ValueError(f"Invalid Interpolation Method: {method}")
+        self.materials = materials
+        self.keys = list(grid)
+        self.axes = [np.asarray(values, dtype=float) for values in grid.values()]
+        self.f = np.asarray(f)
+        self.air = (air_density, air_speed, viscosity, air_pressure, theta)
+        self.method = method
+        self._lower = np.array([axis[0] for axis in self.axes])
+        self._upper = np.array([axis[-1] for axis in self.axes])
+        for key in self.keys:
+            parameter_index(materials, *key)
+
+        points = np.array(list(itertools.product(*self.axes)))
+        self.table = self._solve_points(points, max_elements).reshape(
+            [len(axis) for axis in self.axes] + [len(self.f)])
+        self._interpolator = self._build_interpolator(points)
+
+        self.error = self.rms_error = np.nan
+        if n_check:
+            rng = np.random.default_rng(seed)
+            check_points = self._lower + rng.random((n_check, len(self.axes))) * (self._upper - self._lower)
+            deviation = np.abs(self._interpolate(check_points) - self._solve_points(check_points, max_elements))
+            self.error = deviation.max()
+            self.rms_error = np.sqrt(np.mean(deviation ** 2))
+
+    def __call__(self, values):
+        """Interpolated absorption coefficient.
+
+        Args:
+            values (dict): Value of every varied parameter by (layer index, parameter name)
+
+        Returns:
+            np.ndarray: Absorption coefficient for each frequency
+        """
+        point = np.array([[values[key] for key in self.keys]], dtype=float)
+        for value, axis, key in zip(point[0], self.axes, self.keys):
+            if not axis[0] <= value <= axis[-1]:
+                raise ValueError(f"Value {value} of {key} outside the surrogate grid")
+        return self._interpolate(point)[0]
+
+    def exact(self, values):
+        """Exact absorption coefficient, see absorptioncoeff.solve.
+
+        Args:
+            values (dict): Parameter value by (layer index, parameter name)
+
+        Returns:
+            np.ndarray: Absorption coefficient for each frequency
+        """
+        return absorptioncoeff.solve(stack_with(self.materials, values), self.f, *self.air)
+
+    def preview(self, values, executor):
+        """Returns the interpolated response at once and starts the exact calculation in the background.
+
+        Show the interpolated response while the user interacts and replace it by the result of the future when it is
+        done. Cancel the future when the values change before.
+
+        Args:
+            values (dict): Value of every varied parameter by (layer index, parameter name)
+            executor (concurrent.futures.Executor): Executor of the exact calculation
+
+        Returns:
+            tuple: Interpolated absorption coefficient and the future of the exact one
+        """
+        return self(values), executor.submit(self.exact, values)
+
+    def _solve_points(self, points, max_elements):
+        samples = dict(zip(self.keys, points.T))
+        step = max(1, max_elements // max(1, len(self.f)))
+        alpha = np.empty((len(points), len(self.f)))
+        for start in range(0, len(points), step):
+            stop = min(start + step, len(points))
+            alpha[start:stop] = solve_samples(self.materials, samples, start, stop, self.f, *self.air)
+        return alpha
+
+    def _build_interpolator(self, points):
+        if self.method == 'linear':
+            from scipy.interpolate import RegularGridInterpolator
+            return RegularGridInterpolator(self.axes, self.table)
+
+        from scipy.interpolate import RBFInterpolator
+        # parameters of very different magnitude, the radial basis functions work on the unit cube
+        interpolator = RBFInterpolator(self._unit(points), self.table.reshape(len(points), -1))
+        return lambda x: interpolator(self._unit(x))
+
+    def _unit(self, points):
+        return (points - self._lower) / np.where(self._upper > self._lower, self._upper - self._lower, 1)
+
+    def _interpolate(self, points):
+        return np.clip(self._interpolator(points), 0, 1)
+
@@ -0,0 +1,165 @@
+import numpy as np
+
+from . import models, ratings
+from .absorptioncoeff import AbsorptionCoeff
+from .bands import BandAccumulator
+
+DISTRIBUTIONS = ('normal', 'uniform')
+DEFAULT_PERCENTILES = (5, 50, 95)
+DEFAULT_MAX_ELEMENTS = 2_000_000
+
+
+def parameter_index(materials, layer, parameter):
+    """Position of a named parameter in the layer list, see models.PARAMETERS.
+
+    Args:
+        materials (list): Layers of the stack
+        layer (int): Index of the layer in the stack
+        parameter (str): Name of the parameter, e.g. 'sigma'
+
+    Returns:
+        int: Index of the parameter in the layer list
+    """
+    names = models.PARAMETERS[materials[layer][0]]
+    if parameter not in names:
+        raise ValueError(f"Invalid Parameter: {parameter} for the model {materials[layer][0]}")
+    return names.index(parameter) + 1
+
+
+def draw_samples(materials, tolerances, n_samples, seed=None, method='random'):
+    """Draws samples of the toleranced parameters around their nominal values.
+
+    Args:
+        materials (list): Nominal stack, see models.transfer_matrix for the format of each layer
+        tolerances (dict): Distribution and relative spread by (layer index, parameter name), e.g.
+            {(0, 'sigma'): ('normal', 0.1)}. The spread is the relative standard deviation for 'normal' and the
+            relative half width for 'uniform'.
+        n_samples (int): Number of samples
+        seed (int, optional): Seed of the random generator
+        method (str, optional): 'random' for independent draws, 'lhs' for Latin hypercube sampling
+
+    Returns:
+        dict: Array of n_samples values by (layer index, parameter name)
+    """
+    if method not in ('random', 'lhs'):
+        raise ValueError(f"Invalid Sampling Method: {method}")
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for (layer, parameter), (distribution, spread) in tolerances.items():
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Invalid Distribution: {distribution}")
+        nominal = materials[layer][parameter_index(materials, layer, parameter)]
+
+        if method == 'lhs':
+            # one draw in each of n_samples equally probable strata, in random order
+            u = (rng.permutation(n_samples) + rng.random(n_samples)) / n_samples
+        else:
+            u = rng.random(n_samples)
+        if distribution == 'normal':
+            from scipy.special import ndtri
+            deviation = ndtri(u)
+        else:
+            deviation = 2 * u - 1
+        samples[(layer, parameter)] = nominal * (1 + spread * deviation)
+    return samples
+
+
+def sample_stack(materials, samples, start, stop):
+    """Builds the population stack of the samples start to stop.
+
+    Args:
+        materials (list): Nominal stack
+        samples (dict): Output of draw_samples
+        start (int): First sample
+        stop (int): End of the samples
+
+    Returns:
+        list: Stack whose toleranced parameters are columns of shape (stop - start, 1)
+    """
+    stack = [list(material) for material in materials]
+    for (layer, parameter), values in samples.items():
+        stack[layer][parameter_index(materials, layer, parameter)] = values[start:stop, None]
+    return stack
+
+
+def solve_samples(materials, samples, start, stop, f, air_density, air_speed, viscosity, air_pressure, theta):
+    """Calculates the absorption coefficient of the samples start to stop in one population batch.
+
+    Args:
+        materials (list): Nominal stack
+        samples (dict): Parameter values by (layer index, parameter name), see draw_samples
+        start (int): First sample
+        stop (int): End of the samples
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+
+    Returns:
+        np.ndarray: Absorption coefficient with shape (stop - start, N)
+    """
+    T = (models.transfer_matrix(material, f, air_density, air_speed, viscosity, air_pressure, theta)
+         for material in sample_stack(materials, samples, start, stop))
+    alpha = AbsorptionCoeff(T, air_speed * air_density, theta).abs_coeff()
+    return np.broadcast_to(alpha, (stop - start, np.size(f)))
+
+
+def tolerance_analysis(materials, tolerances, f, air_density, air_speed, viscosity, air_pressure, theta,
+                       n_samples=1000, seed=None, method='random', percentiles=DEFAULT_PERCENTILES,
+                       max_elements=DEFAULT_MAX_ELEMENTS):
+    """Monte Carlo analysis of the absorption coefficient for manufacturing tolerances.
+
+    The samples are evaluated as population batches. The frequencies and samples are processed in blocks of at most
+    max_elements alpha values, so the memory does not depend on n_samples * len(f). The band values of each sample
+    are accumulated over the frequency blocks, so the single number ratings are available for every sample.
+
+    Args:
+        materials (list): Nominal stack, see models.transfer_matrix for the format of each layer
+        tolerances (dict): See draw_samples
+        f (np.ndarray): Frequencies
+        air_density (float): Density of air
+        air_speed (float): Speed of air
+        viscosity (float): Viscosity of air
+        air_pressure (float): Air pressure
+        theta (float): Angle of incidence in radians
+        n_samples (int, optional): Number of samples
+        seed (int, optional): Seed of the random generator
+        method (str, optional): 'random' or 'lhs', see draw_samples
+        percentiles (tuple, optional): Percentiles of the result bands
+        max_elements (int, optional): Maximum number of samples times frequencies evaluated at once
+
+    Returns:
+        dict: Percentiles of alpha with shape (len(percentiles), N), of the octave band values and of the single
+            number ratings, and the samples
+    """
+    f = np.asarray(f)
+    samples = draw_samples(materials, tolerances, n_samples, seed, method)
+    f_step = max(1, max_elements // n_samples)
+    sample_step = max(1, max_elements // f_step)
+
+    alpha_percentiles = np.empty((len(percentiles), len(f)))
+    octaves, thirds = BandAccumulator('oct'), BandAccumulator('third', standard=True)
+    for f_start in range(0, len(f), f_step):
+        f_chunk = f[f_start:f_start + f_step]
+        alpha = np.empty((n_samples, len(f_chunk)))
+        for start in range(0, n_samples, sample_step):
+            stop = min(start + sample_step, n_samples)
+            alpha[start:stop] = solve_samples(materials, samples, start, stop, f_chunk, air_density, air_speed,
+                                              viscosity, air_pressure, theta)
+        alpha_percentiles[:, f_start:f_start + f_step] = np.percentile(alpha, percentiles, axis=0)
+        octaves.update(f_chunk, alpha)
+        thirds.update(f_chunk, alpha)
+
+    octave_means, third_means = octaves.means(), thirds.means()
+    aw, _ = ratings.alpha_w(third_means)
+    single_numbers = {'NRC': ratings.nrc(third_means), 'SAA': ratings.saa(third_means), 'alpha_w': aw}
+    return {
+        'f': f,
+        'percentiles': list(percentiles),
+        'alpha': alpha_percentiles,
+        'octave_bands': np.percentile(octave_means, percentiles, axis=0),
+        'ratings': {name: np.percentile(values, percentiles) for name, values in single_numbers.items()},
+        'samples': samples,
+    }
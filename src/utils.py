@@ -1,8 +1,15 @@
-import pandas as pd
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import numpy as np
-import plotly.graph_objects as go
-import pendulum
-import streamlit as st
+
+from . import bands
+
+# pandas, Plotly, pendulum and Streamlit are imported inside the functions, so that importing this module stays cheap
+if TYPE_CHECKING:
+    import pandas as pd
+    import pendulum
 
 
 # @st.cache_data(show_spinner=False)
@@ -34,6 +41,8 @@ def create_df_export_button(
     Returns:
         bool: Streamlit button functioning a boolean type
     """
+    import pendulum
+    import streamlit as st
 
     if ts is None:
         ts = pendulum.now()
@@ -49,15 +58,48 @@ def create_df_export_button(
 
     file_name = f"{title}_{ts_formatted}.csv".replace(" ", "_").lower()
 
+    # the CSV is only encoded when the button is clicked, not on every rerun
     return st.download_button(
         label="Export",
-        data=_convert_df(df=df),
+        data=lambda: _convert_df(df=df),
         file_name=file_name,
         mime="text/csv",
     )
 
 
-def plotly_go_line(x, y, x_label, y_label, title):
+def decimate_minmax(x, y, n_bins, log_x=True):
+    """Reduces a curve to the minimum and maximum point of each horizontal pixel bin.
+
+    The bins are evenly spaced on the (logarithmic) x axis, so peaks and dips stay visible in the plot while at most
+    2 * n_bins points are kept. The full data is not modified.
+
+    Args:
+        x (np.ndarray): Ascending x values
+        y (np.ndarray): y values
+        n_bins (int): Number of bins, e.g. the plot width in pixels
+        log_x (bool, optional): Whether the x axis is logarithmic
+
+    Returns:
+        tuple: Decimated x and y values
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= 2 * n_bins:
+        return x, y
+
+    position = np.log10(np.where(x > 0, x, np.nan)) if log_x else x.astype(float)
+    start, stop = np.nanmin(position), np.nanmax(position)
+    bins = np.floor((position - start) / (stop - start) * n_bins)
+    bins = np.clip(np.nan_to_num(bins, nan=0), 0, n_bins - 1).astype(int)
+
+    order = np.lexsort((y, bins))  # sorted by bin, and by y within each bin
+    first = np.flatnonzero(np.diff(bins[order], prepend=-1))
+    last = np.append(first[1:] - 1, len(order) - 1)
+    keep = np.unique(np.concatenate([order[first], order[last], [0, len(x) - 1]]))
+    return x[keep], y[keep]
+
+
+def plotly_go_line(x, y, x_label, y_label, title, webgl=False, max_points=None):
     """Creates a plotly-go line plot.
 
     Args:
@@ -66,12 +108,20 @@ def plotly_go_line(x, y, x_label, y_label, title):
         x_label (str): Label for x axis
         y_label (str): Label for y axis
         title (str): Title of the plot
+        webgl (bool, optional): Render the line with WebGL (Scattergl) instead of SVG
+        max_points (int, optional): Decimate the line to at most this many points with decimate_minmax
 
     Returns:
         plotly.graph_objects.Figure: Plotly line plot
     """
+    import plotly.graph_objects as go
+
+    if max_points is not None:
+        x, y = decimate_minmax(x, y, max(1, max_points // 2))
+
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=x, y=y, mode='lines'))
+    scatter = go.Scattergl if webgl else go.Scatter
+    fig.add_trace(scatter(x=x, y=y, mode='lines'))
     fig.update_xaxes(showgrid=True, type='log')
     fig.update_layout(title=title,
                       xaxis_title=x_label,
@@ -82,52 +132,82 @@ def plotly_go_line(x, y, x_label, y_label, title):
     return fig
 
 
-def plotly_freq_bands(x, y, x_label, y_label, title, plot_type='oct'):
-    """Creates a plotly-go bar plot for octave bands.
+def plotly_go_lines(x, ys, names, x_label, y_label, title, webgl=True, max_points=2000):
+    """Creates a plotly-go plot with one line per curve, e.g. to compare several stacks.
 
     Args:
-        x (list): List of x values
-        y (list): List of y values
+        x (list): List of x values, shared by all curves
+        ys (list): List of y values per curve
+        names (list): Legend entry per curve
         x_label (str): Label for x axis
         y_label (str): Label for y axis
         title (str): Title of the plot
-        plot_type (str, optional): Type of plot to create. Options are 'oct' and 'third'.
+        webgl (bool, optional): Render the lines with WebGL (Scattergl) instead of SVG
+        max_points (int, optional): Decimate each line to at most this many points with decimate_minmax
 
     Returns:
-        plotly.graph_objects.Figure: Plotly bar plot.
+        plotly.graph_objects.Figure: Plotly line plot
     """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    scatter = go.Scattergl if webgl else go.Scatter
+    for y, name in zip(ys, names):
+        x_plot, y_plot = (x, y) if max_points is None else decimate_minmax(x, y, max(1, max_points // 2))
+        fig.add_trace(scatter(x=x_plot, y=y_plot, mode='lines', name=name))
+    fig.update_xaxes(showgrid=True, type='log')
+    fig.update_layout(title=title,
+                      xaxis_title=x_label,
+                      yaxis_title=y_label,
+                      yaxis_range=[0, 1],
+                      width=1000,
+                      height=500)
+    return fig
 
-    if plot_type == 'oct':
-        center_freqs = [31.5, 63, 125, 250, 500, 1000, 2000, 4000, 8000, 16000]
-        bw_factor = 2
-    elif plot_type == 'third':
-        center_freqs = [25, 31.5, 40, 50, 63, 80, 100, 125, 160, 200,
-                        250, 315, 400, 500, 630, 800, 1000, 1250, 1600, 2000,
-                        2500, 3150, 4000, 5000, 6300, 8000, 10000, 12500, 16000, 20000]
-        bw_factor = 3
-    else:
-        raise ValueError("Invalid Plot Type")
 
-    freq_bands = []
+def add_measurement(fig, x, y, name, model_name, bars=False):
+    """Adds a measured curve to a plot of plotly_go_line, or measured band values to a plot of plotly_freq_bands.
 
-    for center_freq in center_freqs:
-        lower_cutoff = center_freq / bw_factor
-        upper_cutoff = center_freq * bw_factor
+    Args:
+        fig (plotly.graph_objects.Figure): Plot with the model as first trace
+        x (list): Measured frequencies, or the band positions of plotly_freq_bands if bars is True
+        y (list): Measured values, bands without measured values may be NaN
+        name (str): Legend entry of the measurement
+        model_name (str): Legend entry of the model
+        bars (bool, optional): Whether to add bars next to the band bars instead of markers
 
-        freq_band = {
-            "center_frequency": center_freq,
-            "lower_cutoff_frequency": lower_cutoff,
-            "upper_cutoff_frequency": upper_cutoff
-        }
+    Returns:
+        plotly.graph_objects.Figure: The plot
+    """
+    import plotly.graph_objects as go
+
+    fig.data[0].name = model_name
+    if bars:
+        fig.add_trace(go.Bar(x=x, y=y, name=name))
+        fig.update_layout(barmode='group')
+    else:
+        fig.add_trace(go.Scatter(x=x, y=y, mode='markers', name=name))
+    return fig
 
-        freq_bands.append(freq_band)
 
-    alphas_mean = []  # will hold the mean value for all alphas in each freq band
+def plotly_freq_bands(x, y, x_label, y_label, title, plot_type='oct'):
+    """Creates a plotly-go bar plot for octave bands.
+
+    Args:
+        x (list): List of x values
+        y (list): List of y values
+        x_label (str): Label for x axis
+        y_label (str): Label for y axis
+        title (str): Title of the plot
+        plot_type (str, optional): Type of plot to create. Options are 'oct' and 'third'.
+
+    Returns:
+        plotly.graph_objects.Figure: Plotly bar plot.
+    """
+    import plotly.graph_objects as go
 
-    for band in freq_bands:
-        band_y_values = y[(x >= band['lower_cutoff_frequency']) & (x <= band['upper_cutoff_frequency'])]
-        mean_y_value = np.mean(band_y_values) if len(band_y_values) > 0 else 0
-        alphas_mean.append(mean_y_value)
+    center_freqs = [band['center_frequency'] for band in bands.freq_bands(plot_type)]
+    alphas_mean = bands.band_means(x, y, plot_type)  # will hold the mean value for all alphas in each freq band
 
     # Create evenly spaced x-axis values for plotting
     x_ticks = np.arange(len(center_freqs))
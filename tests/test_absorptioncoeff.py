@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from src import absorptioncoeff, library, models
+
+AIR = (*library.standard_air(), library.STANDARD_PRESSURE)
+
+
+def random_matrices(n_layers, n_frequencies=7, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (n_layers, n_frequencies, 2, 2)
+    return rng.normal(size=shape) + 1j * rng.normal(size=shape)
+
+
+def matmul_product(T):
+    """Reference: np.matmul of the layers in their order."""
+    T_total = T[0]
+    for T_layer in T[1:]:
+        T_total = np.matmul(T_total, T_layer)
+    return T_total
+
+
+@pytest.mark.parametrize('n_layers', [1, 2, 3, 7, 16, 17, 33])
+@pytest.mark.parametrize('method', ['sequential', 'tree', 'auto'])
+def test_chain_product(n_layers, method):
+    T = random_matrices(n_layers)
+    expected = matmul_product(T)
+    np.testing.assert_allclose(absorptioncoeff.chain_product(T, method), expected, rtol=1e-12)
+    np.testing.assert_allclose(absorptioncoeff.chain_product(list(T), method), expected, rtol=1e-12)
+
+
+def test_chain_product_rejects_unknown_methods():
+    with pytest.raises(ValueError):
+        absorptioncoeff.chain_product(random_matrices(2), 'parallel')
+
+
+@pytest.mark.parametrize('n_frequencies', [100, 2000])
+def test_layer_batched_solve_equals_layer_by_layer(n_frequencies):
+    materials = [['Porous', 100 / 64, sigma, 0.98, 1.01] for sigma in np.geomspace(5000, 40000, 64)]
+    f = np.linspace(20, 10000, n_frequencies)
+    T = (models.transfer_matrix(material, f, *AIR, 0) for material in materials)
+    expected = absorptioncoeff.AbsorptionCoeff(T, AIR[0] * AIR[1], 0, chain_method='sequential').abs_coeff()
+    np.testing.assert_allclose(absorptioncoeff.solve(materials, f, *AIR, 0, backend='numpy'), expected, rtol=1e-12,
+                               atol=1e-14)
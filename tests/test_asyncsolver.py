@@ -0,0 +1,49 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src import absorptioncoeff, library
+from src.asyncsolver import AsyncSolver
+
+MATERIALS = [['Porous', 50, 10000, 0.98, 1.01], ['Air', 50]]
+F = np.arange(1, 2000, dtype=float)
+CONDITIONS = (*library.standard_air(), library.STANDARD_PRESSURE, 0)
+
+
+def test_identical_requests_are_shared(monkeypatch):
+    runs, solves = [], []
+    run, solve = AsyncSolver._run, absorptioncoeff.solve
+    monkeypatch.setattr(AsyncSolver, '_run', lambda self, *args: runs.append(args) or run(self, *args))
+    monkeypatch.setattr(absorptioncoeff, 'solve', lambda *args: solves.append(args) or solve(*args))
+
+    async def main():
+        solver = AsyncSolver(max_workers=2, chunk_size=256)
+        try:
+            return await asyncio.gather(*(solver.solve(MATERIALS, F, *CONDITIONS) for _ in range(3)))
+        finally:
+            solver.shutdown()
+
+    alphas = asyncio.run(main())
+    assert len(runs) == 1
+    assert len(solves) == -(-len(F) // 256)
+    expected = solve(MATERIALS, F, *CONDITIONS)
+    for alpha in alphas:
+        np.testing.assert_allclose(alpha, expected, rtol=1e-12, atol=1e-14)
+
+
+def test_repeated_latest_request_is_not_cancelled():
+    async def main():
+        solver = AsyncSolver(max_workers=2, chunk_size=256)
+        try:
+            first = asyncio.ensure_future(solver.solve_latest('user', MATERIALS, F, *CONDITIONS))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(solver.solve_latest('user', MATERIALS, F, *CONDITIONS))
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+        finally:
+            solver.shutdown()
+
+    np.testing.assert_allclose(asyncio.run(main()), absorptioncoeff.solve(MATERIALS, F, *CONDITIONS), rtol=1e-12,
+                               atol=1e-14)
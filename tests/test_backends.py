@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from src import absorptioncoeff, kernels, library, models
+
+AIR = (*library.standard_air(), library.STANDARD_PRESSURE)
+F = np.arange(1, 20000, 97, dtype=float)
+STACKS = {
+    'JAC': [['Porous', 50, 10000, 0.98, 1.4], ['Air', 30]],
+    'DB': [['Porous', 50, 10000, 0.98, 1.4, 'DB'], ['Air', 30]],
+    'Miki': [['Porous', 50, 10000, 0.98, 1.4, 'Miki'], ['Air', 30]],
+    'MPP': [['Microperforated Plate', 1, 0.5, 5], ['Air', 30], ['Porous', 40, 20000, 0.95, 1.2]],
+    'Plate': [['Plate', 3, 1200, 4.1e9, 0.3, 0.1], ['Air', 50]],
+    'Air': [['Air', 20], ['Porous', 30, 8000, 0.97, 1.1, 'DB'], ['Air', 40], ['Porous', 20, 30000, 0.9, 1.6]],
+}
+THETAS = {'normal': 0.0, 'oblique': np.pi / 6}
+needs_numba = pytest.mark.skipif(not kernels.HAVE_NUMBA, reason="numba is not installed")
+
+
+def per_frequency(materials, f, air_density, air_speed, viscosity, air_pressure, theta):
+    """Baseline: one 2x2 transfer matrix per layer and frequency, multiplied with np.matmul."""
+    Z0 = air_speed * air_density
+    alpha = []
+    for f_i in f:
+        T_total = np.eye(2)
+        for material in materials:
+            T_total = np.matmul(T_total, models.transfer_matrix(material, f_i, air_density, air_speed, viscosity,
+                                                                air_pressure, theta))
+        R = ((T_total[0, 0] * np.cos(theta) - Z0 * T_total[1, 0]) /
+             (T_total[0, 0] * np.cos(theta) + Z0 * T_total[1, 0]))
+        alpha.append(1 - np.abs(R) ** 2)
+    return np.array(alpha)
+
+
+@pytest.fixture(scope='module', params=list(STACKS))
+def stack(request):
+    return request.param
+
+
+@pytest.fixture(scope='module', params=list(THETAS))
+def case(request, stack):
+    materials, theta = STACKS[stack], THETAS[request.param]
+    return materials, theta, per_frequency(materials, F, *AIR, theta)
+
+
+def test_numpy_backend(case):
+    materials, theta, expected = case
+    alpha = absorptioncoeff.solve(materials, F, *AIR, theta, backend='numpy')
+    np.testing.assert_allclose(alpha, expected, rtol=1e-10, atol=1e-12)
+
+
+def test_single_precision(case):
+    materials, theta, expected = case
+    alpha = absorptioncoeff.solve(materials, F, *AIR, theta, precision='single')
+    np.testing.assert_allclose(alpha, expected, rtol=0, atol=1e-5)
+
+
+@needs_numba
+def test_numba_backend(case):
+    materials, theta, expected = case
+    alpha = absorptioncoeff.solve(materials, F, *AIR, theta, backend='numba')
+    np.testing.assert_allclose(alpha, expected, rtol=1e-10, atol=1e-12)
+
+
+@needs_numba
+def test_numba_backend_off_main_thread(case):
+    # Streamlit runs the pages outside of the main thread, where the serial kernel is used
+    materials, theta, expected = case
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(
+        alpha=absorptioncoeff.solve(materials, F, *AIR, theta, backend='numba')))
+    thread.start()
+    thread.join()
+    np.testing.assert_allclose(results['alpha'], expected, rtol=1e-10, atol=1e-12)
+
+
+def test_numpy_is_the_default_backend():
+    assert kernels.get_backend() == 'numpy'
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_CHECK = """
+import threading
+from src import absorptioncoeff, kernels, library
+args = ([['Porous', 50, 10000, 0.98, 1.4]], library.STANDARD_F[:10], *library.standard_air(),
+        library.STANDARD_PRESSURE, 0)
+absorptioncoeff.solve(*args, backend='numba')
+thread = threading.Thread(target=absorptioncoeff.solve, args=args, kwargs={'backend': 'numba'})
+thread.start()
+thread.join()
+for kernel in (kernels._chain_abs_coeff_parallel, kernels._chain_abs_coeff):
+    print(sum(kernel.stats.cache_hits.values()))
+"""
+
+
+def cache_hits():
+    """Runs the parallel and the serial kernel in a new process and returns their numbers of cache hits."""
+    return subprocess.run([sys.executable, '-c', CACHE_CHECK], cwd=ROOT, capture_output=True, text=True,
+                          check=True).stdout.split()
+
+
+@needs_numba
+def test_both_numba_kernels_are_cached():
+    cache_hits()
+    assert cache_hits() == ['1', '1']
@@ -0,0 +1,69 @@
+import copy
+
+import numpy as np
+import pytest
+
+from src import absorptioncoeff, jobs
+from src.air import air_properties
+
+JOB = {
+    'materials': [['Porous', 50, 10000, 0.98, 1.01], ['Air', 50]],
+    'sweep': [
+        {'layer': 0, 'parameter': 'thickness', 'values': [20, 40, 60]},
+        {'layer': 0, 'parameter': 'sigma', 'values': [5000, 20000]},
+    ],
+    'f': {'start': 100, 'stop': 2000, 'step': 50},
+    'output': 'alpha',
+    'block_size': 2,
+}
+
+
+@pytest.fixture
+def job():
+    return jobs.parse_job(copy.deepcopy(JOB))
+
+
+def test_shards_split_the_blocks(job):
+    assert jobs.blocks(job) == [(0, 2), (2, 4), (4, 6)]
+    shards = [jobs.shard_blocks(job, shard, 2) for shard in range(2)]
+    assert shards == [[(0, 2), (2, 4)], [(4, 6)]]
+    with pytest.raises(ValueError):
+        jobs.shard_blocks(job, 2, 2)
+
+
+def test_shards_run_independently_and_resume(job, tmp_path):
+    assert jobs.run_shard(job, tmp_path, 1, 2) == 1
+    assert jobs.missing_blocks(job, tmp_path) == [(0, 2), (2, 4)]
+    with pytest.raises(ValueError, match="Incomplete Job: 2 of 3"):
+        jobs.merge(job, tmp_path)
+
+    assert jobs.run_shard(job, tmp_path, 0, 2) == 2
+    assert jobs.run_shard(job, tmp_path, 0, 2) == 0
+    assert jobs.run_shard(job, tmp_path, 1, 2) == 0
+    assert jobs.missing_blocks(job, tmp_path) == []
+
+
+def test_merge_keeps_the_order_of_the_configurations(job, tmp_path):
+    jobs.run_shard(job, tmp_path, 1, 2)
+    jobs.run_shard(job, tmp_path, 0, 2)
+    with np.load(jobs.merge(job, tmp_path)) as result:
+        np.testing.assert_array_equal(result['values'], [[20, 5000], [20, 20000], [40, 5000], [40, 20000],
+                                                         [60, 5000], [60, 20000]])
+        assert result['parameters'].tolist() == ['0.thickness', '0.sigma']
+        air = air_properties(job['temperature'], job['air_pressure'], job['humidity'])
+        for (thickness, sigma), alpha in zip(result['values'], result['alpha']):
+            materials = [['Porous', thickness, sigma, 0.98, 1.01], ['Air', 50]]
+            np.testing.assert_allclose(alpha, absorptioncoeff.solve(materials, result['f'], *air, job['air_pressure'],
+                                                                    0), rtol=1e-10, atol=1e-12)
+
+
+def test_jobs_sharing_a_directory_keep_their_results(job, tmp_path):
+    other = jobs.parse_job({**copy.deepcopy(JOB), 'output': 'bands'})
+    paths = []
+    for parsed in (job, other):
+        jobs.run_shard(parsed, tmp_path)
+        paths.append(jobs.merge(parsed, tmp_path))
+
+    assert paths[0] != paths[1]
+    with np.load(paths[0]) as first, np.load(paths[1]) as second:
+        assert 'alpha' in first.files and 'alpha' not in second.files
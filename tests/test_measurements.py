@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from src import measurements
+
+
+@pytest.mark.parametrize('text', [
+    "f,alpha\n100,0.1\n200,0.25\n",
+    "f, alpha\n100, 0.1\n200, 0.25\n",
+    "f;alpha\n100;0,1\n200;0,25\n",
+    "f\talpha\n100\t0,1\n200\t0,25\n",
+    "# f alpha\n100 0.1\n200 0.25\n",
+    "Frequency in Hz, alpha\n100 0,1\n200   0,25\n",
+    "100,0 0,1 1\n200,0 0,25 1\n",
+])
+def test_read_measurement_formats(text):
+    f, alpha = measurements.read_measurement(text.encode())
+    np.testing.assert_array_equal(f, [100, 200])
+    np.testing.assert_array_equal(alpha, [0.1, 0.25])
+
+
+def test_read_measurement_rejects_broken_rows():
+    with pytest.raises(ValueError, match="line 3"):
+        measurements.read_measurement(b"100 0,1\n200 0,25\n300\n")
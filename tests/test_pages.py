@@ -0,0 +1,37 @@
+import json
+import os
+
+import pytest
+
+st = pytest.importorskip('streamlit')
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_page(page):
+    """Runs a calculator page with a porous layer in front of an air gap."""
+    app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=120)
+    app.run()
+    for i, option in ((0, 1), (1, 4)):
+        selectbox = app.selectbox(key=f'value1_{i}')
+        selectbox.set_value(selectbox.options[option])
+    app.run()
+    app.number_input(key='value2_0').set_value(50.0)
+    app.number_input(key='value2_1').set_value(30.0)
+    app.number_input(key='value3_0').set_value(10000.0)
+    app.run()
+    assert not app.exception
+    return app
+
+
+def test_pages_do_not_share_cached_figures_and_tables(tmp_path, monkeypatch):
+    # both pages run as __main__, so their cached functions share one cache
+    monkeypatch.setenv('ABSORPTION_CACHE_DIR', str(tmp_path))
+    st.cache_resource.clear()
+    english, german = run_page('Calculator-EN.py'), run_page(os.path.join('pages', 'Calculator-DE.py'))
+
+    assert list(english.dataframe[0].value.columns) == ['Frequency [Hz]', 'Absorption coefficient [1]']
+    assert list(german.dataframe[0].value.columns) == ['Frequenz [Hz]', 'Absorptionsgrad [1]']
+    titles = [json.loads(app.get('plotly_chart')[0].proto.spec)['layout']['title']['text'] for app in (english, german)]
+    assert titles == ['Absorption coefficient plot', 'Absorptionsgrad Plot']
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from src import absorptioncoeff, library, ratings
+from src.bands import THIRD_OCTAVE_CENTER_FREQS
+
+
+def thirds(values, default=0.0):
+    """Third octave band values with the given values at their center frequencies."""
+    bands = np.full(len(THIRD_OCTAVE_CENTER_FREQS), default)
+    for freq, value in values.items():
+        bands[THIRD_OCTAVE_CENTER_FREQS.index(freq)] = value
+    return bands
+
+
+def octaves(alpha_p):
+    """Third octave band values whose octave means are the given practical coefficients at 250 Hz to 4 kHz."""
+    values = {}
+    for freq, value in zip(ratings.ALPHA_W_FREQS, alpha_p):
+        i = THIRD_OCTAVE_CENTER_FREQS.index(freq)
+        values.update({THIRD_OCTAVE_CENTER_FREQS[i - 1]: value - 0.05, freq: value,
+                       THIRD_OCTAVE_CENTER_FREQS[i + 1]: value + 0.05})
+    return thirds(values)
+
+
+def test_rating_bands_have_standard_width():
+    f = np.arange(1, 20000, dtype=float)
+    band = (f >= 1000 * 2 ** (-1 / 6)) & (f <= 1000 * 2 ** (1 / 6))
+    alpha = np.where(f < 1000, 0.2, 0.6)
+    expected = alpha[band].mean()
+    assert ratings.rating_bands(alpha, f)[THIRD_OCTAVE_CENTER_FREQS.index(1000)] == pytest.approx(expected)
+    assert f[band][[0, -1]].tolist() == [891, 1122]
+
+
+@pytest.mark.parametrize('values, expected', [
+    ({250: 0.3, 500: 0.5, 1000: 0.7, 2000: 0.74}, 0.55),
+    ({250: 0.3, 500: 0.5, 1000: 0.7, 2000: 0.82}, 0.6),
+    ({250: 1.0, 500: 1.0, 1000: 1.0, 2000: 1.0}, 1.0),
+])
+def test_nrc_rounds_to_005(values, expected):
+    assert ratings.nrc(thirds(values, default=0.9)) == pytest.approx(expected)
+
+
+def test_saa_is_the_mean_of_twelve_bands_rounded_to_001():
+    values = dict(zip(ratings.SAA_FREQS, np.linspace(0.1, 0.7642, 12)))
+    assert ratings.saa(thirds(values, default=1.0)) == pytest.approx(0.43)
+
+
+def test_practical_coefficients_are_octave_means_of_thirds():
+    alpha_p = ratings.practical_coefficients(thirds({200: 0.6, 250: 0.8, 315: 0.93, 400: 1.0, 500: 1.1, 630: 1.2,
+                                                     800: 0.31, 1000: 0.32, 1250: 0.33}))
+    np.testing.assert_allclose(alpha_p, [0.8, 1.0, 0.3, 0.0, 0.0])
+
+
+@pytest.mark.parametrize('alpha_p, aw, shape, absorption_class', [
+    ([0.35, 0.70, 0.95, 0.90, 0.85], 0.65, 'MH', 'C'),
+    ([1.0, 1.0, 1.0, 1.0, 1.0], 1.0, '', 'A'),
+    ([0.8, 0.4, 0.4, 0.4, 0.4], 0.4, 'L', 'D'),
+    ([0.1, 0.1, 0.1, 0.1, 0.1], 0.1, '', '-'),
+])
+def test_alpha_w_shift_shape_and_class(alpha_p, aw, shape, absorption_class):
+    bands = octaves(alpha_p)
+    np.testing.assert_allclose(ratings.practical_coefficients(bands), alpha_p)
+    result = ratings.ratings(bands[None])
+    assert result['alpha_w'][0] == pytest.approx(aw)
+    assert result['shape'][0] == shape
+    assert result['class'][0] == absorption_class
+
+
+def test_ratings_of_a_microperforated_plate():
+    f = library.STANDARD_F
+    alpha = absorptioncoeff.solve([['Microperforated Plate', 1, 0.5, 5], ['Air', 100]], f, *library.standard_air(),
+                                  library.STANDARD_PRESSURE, 0)
+    result = ratings.ratings(alpha[None], f)
+    assert result['SAA'][0] == pytest.approx(0.43)
+    assert result['NRC'][0] == pytest.approx(0.45)
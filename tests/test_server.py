@@ -0,0 +1,127 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src import absorptioncoeff, compare, library, server
+
+VALID = [['Porous', 50, 10000, 0.98, 1.01], ['Air', 50]]
+F = [100, 200, 400, 800]
+
+
+@pytest.fixture
+def service():
+    # a long latency, so that concurrent requests end up in one batch
+    httpd = server.create_server(port=0, max_latency=0.5)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    httpd.batcher.close()
+
+
+def strict_json(text):
+    """Decodes JSON without the NaN and Infinity extensions of the json module."""
+    def reject(constant):
+        raise ValueError(f"Invalid JSON constant {constant}")
+    return json.loads(text, parse_constant=reject)
+
+
+def post(url, body):
+    request = urllib.request.Request(url + '/solve', data=json.dumps(body).encode('utf-8'), method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, strict_json(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, strict_json(e.read())
+
+
+def expected(materials):
+    return absorptioncoeff.solve(materials, np.asarray(F, dtype=float), *library.standard_air(),
+                                 library.STANDARD_PRESSURE, 0, backend='numpy')
+
+
+def test_health(service):
+    with urllib.request.urlopen(service + '/health') as response:
+        assert json.loads(response.read()) == {'status': 'ok'}
+
+
+def test_concurrent_requests_are_batched(service, monkeypatch):
+    batches = []
+    solve_population = compare.solve_population
+    monkeypatch.setattr(compare, 'solve_population',
+                        lambda stacks, *args: batches.append(len(stacks)) or solve_population(stacks, *args))
+    stacks = [[['Porous', thickness, 10000, 0.98, 1.01], ['Air', 50]] for thickness in (20, 40, 60, 80)]
+    with ThreadPoolExecutor(len(stacks)) as executor:
+        responses = list(executor.map(lambda materials: post(service, {'materials': materials, 'f': F}), stacks))
+
+    assert batches == [len(stacks)]
+    for materials, (status, response) in zip(stacks, responses):
+        assert status == 200
+        np.testing.assert_allclose(response['alpha'], expected(materials), rtol=1e-12, atol=1e-14)
+
+
+def test_invalid_request_does_not_fail_its_batch(service):
+    with ThreadPoolExecutor(2) as executor:
+        valid = executor.submit(post, service, {'materials': VALID, 'f': F})
+        invalid = executor.submit(post, service, {'materials': [['Porous', 50, 10000], ['Air', 50]], 'f': F})
+        (valid_status, valid_response), (invalid_status, invalid_response) = valid.result(), invalid.result()
+
+    assert valid_status == 200
+    np.testing.assert_allclose(valid_response['alpha'], expected(VALID), rtol=1e-12, atol=1e-14)
+    assert invalid_status == 400
+    assert 'Invalid Layer' in invalid_response['error']
+
+
+def test_failing_batch_is_solved_request_by_request():
+    batcher = server.Batcher(max_latency=0.5)
+    try:
+        conditions = (*library.standard_air(), library.STANDARD_PRESSURE, 0)
+        valid = batcher.submit(VALID, F, *conditions)
+        # bypasses parse_request, the missing parameters fail the population batch
+        invalid = batcher.submit([['Porous', 50, 10000, 0.98], ['Air', 50]], F, *conditions)
+        np.testing.assert_allclose(valid.result(timeout=30), expected(VALID), rtol=1e-12, atol=1e-14)
+        with pytest.raises(Exception):
+            invalid.result(timeout=30)
+    finally:
+        batcher.close()
+
+
+@pytest.mark.parametrize('materials', [
+    [['Porous', 50, 10000]],
+    [['Porous', 50, 10000, 0.98, 1.01, 'XYZ']],
+    [['Air', 50, 1]],
+    [['Plate', 1, 7800, 2e11, 0.3, True]],
+    [['Glass', 4]],
+    [['Porous', 50, 0, 0.98, 1.01]],
+    [['Porous', 50, 10000, -0.5, 1.01]],
+    [['Porous', 0, 10000, 0.98, 1.01]],
+    [['Microperforated Plate', 1, 0.5, 0]],
+    [['Air', float('nan')]],
+])
+def test_parse_request_checks_layers(materials):
+    with pytest.raises(ValueError):
+        server.parse_request({'materials': materials})
+
+
+def test_non_finite_values_are_null(service, monkeypatch):
+    monkeypatch.setattr(compare, 'solve_population', lambda stacks, f, *args: np.full((len(stacks), len(f)), np.nan))
+    status, response = post(service, {'materials': VALID, 'f': F, 'bands': 'oct',
+                                      'measured': {'f': F, 'alpha': [0.1, 0.2, 0.3, 0.4]}})
+
+    assert status == 200
+    assert response['alpha'] == [None] * len(F)
+    assert None in response['band_alpha']
+    assert response['measurement']['alpha_model'] == [None] * len(F)
+
+
+def test_physically_invalid_layer_is_rejected(service):
+    status, response = post(service, {'materials': [['Porous', 50, 0, 0.98, 1.01]], 'f': [100, 200]})
+
+    assert status == 400
+    assert 'sigma' in response['error']